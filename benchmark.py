@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the dashboard data paths and the ETL
+
+Times the data selection of each dashboard tool for every country, cold and
+warm dataset loads, the dashboard's cold first render, and process_wage_data()
+on synthetic exports scaled from the raw ILOSTAT file. Results are written as JSON so runs can be compared
+between releases.
+
+Usage:
+    python benchmark.py [--output benchmark_results.json] [--scales 10 100 1000]
+                        [--engines python pandas] [--repeat 5] [--skip-etl]
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+
+import pandas as pd
+
+from wage_data import COLUMNAR_FILE, CSV_FILE, NOTE_COLUMNS, TOOL_COLUMNS, WageIndex, frame_bytes, load_wage_data
+from wage_summary import load_cube
+from wage_gaps import GAP_DEFINITIONS
+from wage_tools import select_comparison, select_disparity, select_ranking, select_trends
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data-raw'))
+
+import data_processing as dp
+
+# Fresh interpreter run for cold-start timings: prints load seconds
+COLD_LOAD_SCRIPT = '''
+import time
+start = time.perf_counter()
+{setup}
+print(time.perf_counter() - start)
+'''
+
+# Fresh interpreter first render of the dashboard: prints the startup report
+COLD_RENDER_SCRIPT = '''
+import json, os, time
+os.environ['STARTUP_REPORT'] = '0'
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+AppTest.from_file('streamlit_app.py', default_timeout=120).run()
+from startup import REPORT
+print(json.dumps(dict(REPORT.as_dict(), total_s=time.perf_counter() - start)))
+'''
+
+
+def timing_stats(samples):
+    """Summarize a list of durations in seconds"""
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'total_s': sum(ordered),
+        'mean_s': statistics.mean(ordered),
+        'p50_s': ordered[len(ordered) // 2],
+        'p95_s': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max_s': ordered[-1]
+    }
+
+
+def time_call(fn, *args, **kwargs):
+    """Return the wall-clock duration of one call"""
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def cold_load(setup):
+    """Time a dataset load in a fresh interpreter, including imports"""
+    result = subprocess.run(
+        [sys.executable, '-c', COLD_LOAD_SCRIPT.format(setup=setup)],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_loading(repeat):
+    """Time cold and warm loads from the columnar artifact and the CSV"""
+    columnar = 'from wage_data import load_wage_data; load_wage_data()'
+    csv_only = f'from wage_data import load_wage_data; load_wage_data(columnar_path={"missing.arrow"!r})'
+    results = {
+        'cold_columnar': timing_stats([cold_load(columnar) for _ in range(repeat)]),
+        'cold_csv': timing_stats([cold_load(csv_only) for _ in range(repeat)]),
+        'warm_columnar': timing_stats([time_call(load_wage_data) for _ in range(repeat)]),
+        'warm_csv': timing_stats([
+            time_call(load_wage_data, columnar_path='missing.arrow') for _ in range(repeat)
+        ])
+    }
+
+    results['memory_bytes'] = {
+        'csv_frame': frame_bytes(pd.read_csv(CSV_FILE)),
+        'compact': frame_bytes(load_wage_data()),
+        'lean': frame_bytes(load_wage_data(columns=TOOL_COLUMNS)),
+        'notes': frame_bytes(load_wage_data(columns=NOTE_COLUMNS))
+    }
+    results['artifact_bytes'] = {
+        'csv': os.path.getsize(CSV_FILE),
+        'columnar': os.path.getsize(COLUMNAR_FILE) if os.path.exists(COLUMNAR_FILE) else None
+    }
+    return results
+
+
+def benchmark_startup(repeat):
+    """Time the dashboard's first render in fresh interpreters"""
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', COLD_RENDER_SCRIPT],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    phases = {name for run in runs for name in run['phases']}
+    return {
+        'cold_total': timing_stats([run['total_s'] for run in runs]),
+        'first_render': timing_stats([run['first_render_s'] for run in runs]),
+        'phases': {
+            name: timing_stats([run['phases'][name] for run in runs if name in run['phases']])
+            for name in sorted(phases)
+        }
+    }
+
+
+def benchmark_tools(repeat):
+    """Time each tool's data selection for every country"""
+    df = load_wage_data()
+
+    start = time.perf_counter()
+    index = WageIndex(df)
+    index_build = time.perf_counter() - start
+
+    summary, gaps = load_cube(df)
+    summary = summary.to_dict('index')
+    countries = index.countries
+
+    samples = {
+        'Wage Disparity Tool': [],
+        'Trends Tool': [],
+        'Comparison Tool': [],
+        'Comparison Tool (all countries)': [],
+        'Ranking Tool': []
+    }
+    for _ in range(repeat):
+        samples['Comparison Tool (all countries)'].append(
+            time_call(select_comparison, index, summary, gaps, countries)
+        )
+        for gap_type in GAP_DEFINITIONS:
+            samples['Ranking Tool'].append(time_call(select_ranking, gaps, gap_type))
+        for i, country in enumerate(countries):
+            years = (summary[country]['first_year'], summary[country]['latest_year'])
+            other = countries[(i + 1) % len(countries)]
+            samples['Wage Disparity Tool'].append(time_call(select_disparity, summary, country))
+            samples['Trends Tool'].append(time_call(select_trends, index, gaps, country, years))
+            samples['Comparison Tool'].append(
+                time_call(select_comparison, index, summary, gaps, [country, other])
+            )
+
+    results = {tool: timing_stats(times) for tool, times in samples.items()}
+    results['index_build_s'] = index_build
+    results['countries'] = len(countries)
+    return results
+
+
+def write_scaled_export(path, scale):
+    """Write a raw export holding scale copies of the ILOSTAT file
+
+    Countries are renamed in each extra copy so every key stays unique and
+    the rows pass the ETL's duplicate key check.
+    """
+    with dp.open_text(dp.INPUT_FILE, 'r') as infile:
+        header, *rows = csv.reader(infile)
+
+    with open(path, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(header)
+        for copy in range(scale):
+            suffix = f' {copy}' if copy else ''
+            writer.writerows([row[0] + suffix, *row[1:]] for row in rows)
+
+
+def benchmark_etl(scales, engines):
+    """Time process_wage_data() on synthetic exports for each engine"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for scale in scales:
+            export = os.path.join(tmp_dir, f'export-{scale}x.csv')
+            output = os.path.join(tmp_dir, f'tidy-{scale}x.csv')
+            write_scaled_export(export, scale)
+
+            for engine in engines:
+                with redirect_stdout(StringIO()):
+                    start = time.perf_counter()
+                    rows = dp.process_wage_data(export, output, artifacts=False, engine=engine)
+                    elapsed = time.perf_counter() - start
+                results[f'{engine}_{scale}x'] = {
+                    'engine': engine,
+                    'scale': scale,
+                    'rows': rows,
+                    'seconds': elapsed,
+                    'rows_per_s': rows / elapsed
+                }
+                print(f'  {engine:>7} {scale:>5}x {rows:>10,} rows {elapsed:8.2f} s {rows / elapsed:>12,.0f} rows/s')
+            os.remove(export)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard data paths and the ETL')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON results file')
+    parser.add_argument('--scales', type=int, nargs='+', default=[10, 100, 1000],
+                        help='multiples of the raw export row count for ETL timings')
+    parser.add_argument('--engines', nargs='+', default=['python', 'pandas'], choices=sorted(dp.ENGINES),
+                        help='ETL engines to time')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions for load and tool timings')
+    parser.add_argument('--skip-etl', action='store_true', help='skip the ETL timings')
+    args = parser.parse_args()
+
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        }
+    }
+
+    print('⏱️  Dataset loading')
+    results['loading'] = benchmark_loading(args.repeat)
+    for name, stats in results['loading'].items():
+        if 'p50_s' in stats:
+            print(f'  {name:<14} p50 {stats["p50_s"] * 1000:8.2f} ms')
+    for name, nbytes in results['loading']['memory_bytes'].items():
+        print(f'  {name + " memory":<14}     {nbytes / 1e6:8.3f} MB')
+
+    print('⏱️  Dashboard startup')
+    results['startup'] = benchmark_startup(args.repeat)
+    print(f'  {"first render":<20} p50 {results["startup"]["first_render"]["p50_s"] * 1000:8.1f} ms')
+    for name, stats in results['startup']['phases'].items():
+        print(f'  {name:<20} p50 {stats["p50_s"] * 1000:8.1f} ms')
+
+    print('⏱️  Tool data selection')
+    results['tools'] = benchmark_tools(args.repeat)
+    for tool, stats in results['tools'].items():
+        if not isinstance(stats, dict):
+            continue
+        print(f'  {tool:<32} p50 {stats["p50_s"] * 1e6:8.1f} µs  p95 {stats["p95_s"] * 1e6:8.1f} µs')
+
+    if not args.skip_etl:
+        print('⏱️  ETL')
+        results['etl'] = benchmark_etl(args.scales, args.engines)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f'\nResults saved to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
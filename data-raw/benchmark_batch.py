@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the parallel batch mode of data_processing.py
+
+Writes a set of synthetic raw exports (copies of the filtered ILOSTAT export)
+to a temporary directory, processes them with an increasing number of worker
+processes and reports wall-clock time and speedup over a single worker.
+
+Usage:
+    python benchmark_batch.py [--files N] [--copies N] [--workers 1 2 4 ...]
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from data_processing import INPUT_FILE, open_text, process_wage_files
+
+
+def write_exports(directory, files, copies):
+    """Write synthetic raw exports, each holding copies of the real export
+
+    Countries are renamed in each extra copy within a file so its keys stay
+    unique and pass the duplicate key check.
+    """
+    with open_text(INPUT_FILE, 'r') as infile:
+        header, *rows = csv.reader(infile)
+
+    for i in range(files):
+        with open(os.path.join(directory, f'export-{i:03d}.csv'), 'w', encoding='utf-8', newline='') as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(header)
+            for copy in range(copies):
+                suffix = f' {copy}' if copy else ''
+                writer.writerows([row[0] + suffix, *row[1:]] for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel ETL over many raw exports')
+    parser.add_argument('--files', type=int, default=16, help='number of raw export files')
+    parser.add_argument('--copies', type=int, default=4, help='copies of the export per file')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+                        help='worker counts to time')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_dir = os.path.join(tmp_dir, 'raw')
+        os.makedirs(input_dir)
+        write_exports(input_dir, args.files, args.copies)
+        output_file = os.path.join(tmp_dir, 'ilostat_wage.csv')
+
+        print(f'{args.files} files x {args.copies} copies, {os.cpu_count()} CPUs')
+        print(f'{"workers":>8} {"seconds":>9} {"rows/s":>12} {"speedup":>8}')
+
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            with redirect_stdout(open(os.devnull, 'w')):
+                total = process_wage_files(input_dir, output_file, workers=workers, artifacts=False)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f'{workers:>8} {elapsed:>9.2f} {total / elapsed:>12,.0f} {baseline / elapsed:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
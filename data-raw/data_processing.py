@@ -4,62 +4,938 @@ Data processing script for ILO wage statistics
 
 This script reads the raw ILO wage data and processes it into a tidy format
 suitable for analysis and publication.
+
+Rows are streamed from the raw export to the tidy CSV one country at a time,
+so memory use is bounded by the largest country (or pandas chunk) rather than
+the size of the input. Paths ending in .gz are read and written with gzip. A
+directory or glob of exports is processed in parallel by a process pool and
+merged into a single tidy file. With --incremental, only countries whose rows
+changed since the last run are rewritten and the changes are recorded in a
+changelog.
+
+Rows are validated in the same pass as they are cleaned: records with extra
+fields, unparsable years or earnings, unknown sex or area type values,
+duplicate (country, source, sex, area_type, year) keys and Totals outside the
+Male-Female range are written to a quarantine file next to the output instead
+of the tidy CSV. Duplicates and Male-Female-Total groups are only matched
+within a run of rows of one country, as the ILOSTAT export is sorted by
+country. The tidy CSV is written to a temporary file and moved into place
+only when the run succeeds.
+
+Usage:
+    python data_processing.py [--input RAW.csv[.gz] | DIR | GLOB] [--output TIDY.csv[.gz]]
+                              [--workers N] [--engine python|pandas] [--incremental]
+                              [--no-artifacts]
 """
 
+import argparse
 import csv
+import glob
+import gzip
+import hashlib
+import io
+import math
 import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Shared dataset helpers live at the repository root
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..'))
+
+from wage_data import write_columnar
+from wage_summary import write_cube
+
+# Default input and output file paths
+INPUT_FILE = os.path.join(SCRIPT_DIR, 'EAR_4MTH_SEX_GEO_CUR_NB_A-filtered-2025-06-01.csv')
+OUTPUT_FILE = os.path.normpath(os.path.join(SCRIPT_DIR, '..', 'ilostat_wage.csv'))
+
+# Key columns of the incremental manifest
+MANIFEST_KEY = ['country', 'source', 'sex', 'area_type', 'year']
+MANIFEST_SEPARATOR = '\x1f'
+
+# Columns of the per-country table of an incremental run: the byte ranges of
+# the country's rows in the tidy CSV and in the quarantine file, its first
+# line in the raw export and content hashes of its raw rows and of its tidy
+# and quarantined bytes
+OFFSET_COLUMNS = [
+    'country', 'start', 'end', 'quarantine_start', 'quarantine_end', 'line', 'raw_hash', 'tidy_hash'
+]
+
+# Rows per chunk for the pandas engine
+CHUNK_ROWS = 100_000
+
+# Values accepted for the sex and area type columns
+SEX_VALUES = {'Total', 'Male', 'Female', 'Other'}
+AREA_TYPES = {'National', 'Urban', 'Rural'}
+
+# Groups whose Total is checked against the Male and Female earnings
+RECONCILED_SEXES = ['Male', 'Female', 'Total']
+RECONCILE_GROUP = ['country', 'source', 'area_type', 'year']
+
+# Relative distance Total may fall outside the Male-Female range
+RECONCILE_TOLERANCE = 0.01
+UNRECONCILED = 'Total outside the Male-Female range'
+
+# Clean column names mapping
+CLEAN_COLUMNS = {
+    'ref_area.label': 'country',
+    'source.label': 'source',
+    'indicator.label': 'indicator',
+    'sex.label': 'sex',
+    'classif1.label': 'area_type',
+    'classif2.label': 'currency_info',
+    'time': 'year',
+    'obs_value': 'earnings_ppp',
+    'obs_status.label': 'obs_status',
+    'note_indicator.label': 'note_indicator',
+    'note_source.label': 'note_source'
+}
+
+# Positions of the MANIFEST_KEY columns in a tidy row
+KEY_POSITIONS = [list(CLEAN_COLUMNS.values()).index(col) for col in MANIFEST_KEY]
+
+# Columns of the quarantine file of rejected rows
+QUARANTINE_COLUMNS = ['file', 'line', 'reason'] + list(CLEAN_COLUMNS.values())
+
+
+def open_text(path, mode):
+    """Open a CSV file for reading ('r') or writing ('w'), gzip-compressed if it ends in .gz"""
+    encoding = 'utf-8-sig' if mode == 'r' else 'utf-8'
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding=encoding, newline='')
+    return open(path, mode, encoding=encoding, newline='')
+
+
+def artifact_path(output_file, suffix):
+    """Return the path of an artifact written next to the tidy CSV"""
+    base = output_file[:-3] if output_file.endswith('.gz') else output_file
+    base = os.path.splitext(base)[0]
+    return f'{base}{suffix}'
+
+
+@contextmanager
+def atomic_output(output_file):
+    """Yield a temporary path that replaces output_file only if the block succeeds
+
+    The temporary file keeps the output's extension, so .gz outputs are still
+    written with gzip, and is removed when the block raises.
+    """
+    directory, name = os.path.split(os.path.abspath(output_file))
+    tmp_file = os.path.join(directory, f'.tmp-{name}')
+    try:
+        yield tmp_file
+        os.replace(tmp_file, output_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def clean_row(row):
+    """Convert one raw ILOSTAT row into a tidy row"""
+    clean = {}
+    for old_col, new_col in CLEAN_COLUMNS.items():
+        clean[new_col] = row[old_col]
+
+    # Clean area type - remove "Area type: " prefix
+    if clean['area_type'].startswith('Area type: '):
+        clean['area_type'] = clean['area_type'].replace('Area type: ', '')
+
+    # Convert year to integer
+    clean['year'] = int(clean['year'])
+
+    # Convert earnings to float
+    clean['earnings_ppp'] = float(clean['earnings_ppp'])
+
+    return clean
+
+
+def raw_reader(infile):
+    """Read the rows of a raw export as dicts
+
+    Fields missing from the end of a short row are read as empty strings, as
+    pandas reads them.
+    """
+    return csv.DictReader(infile, restval='')
+
+
+def invalid_reason(row):
+    """Return why clean_row() failed on a raw row"""
+    for column, convert in [('time', int), ('obs_value', float)]:
+        try:
+            convert(row[column])
+        except ValueError:
+            return f'invalid {column} {row[column]!r}'
+
+
+def key_problem(key, seen):
+    """Return why a cleaned row's key is rejected, or None
+
+    seen holds the hashes of the keys already accepted in the row's block.
+    """
+    if key[2] not in SEX_VALUES:
+        return f'unknown sex {key[2]!r}'
+    if key[3] not in AREA_TYPES:
+        return f'unknown area_type {key[3]!r}'
+    if hash(key) in seen:
+        return 'duplicate key'
+    return None
+
+
+def unreconciled(accepted):
+    """Return the positions of the rows in groups whose Total is outside the Male-Female range
+
+    accepted holds the (line, tidy row) pairs of one country block. Groups
+    missing Male, Female or Total earnings are not checked.
+    """
+    groups = {}
+    for position, (_, clean) in enumerate(accepted):
+        if clean['sex'] in RECONCILED_SEXES:
+            group = tuple(clean[col] for col in RECONCILE_GROUP)
+            groups.setdefault(group, {})[clean['sex']] = (clean['earnings_ppp'], position)
+
+    positions = set()
+    for members in groups.values():
+        if len(members) < len(RECONCILED_SEXES) or any(math.isnan(value) for value, _ in members.values()):
+            continue
+        low, high = sorted([members['Male'][0], members['Female'][0]])
+        total = members['Total'][0]
+        if total < low * (1 - RECONCILE_TOLERANCE) or total > high * (1 + RECONCILE_TOLERANCE):
+            positions.update(position for _, position in members.values())
+    return positions
+
+
+def unreconciled_frame(df, groups):
+    """Vectorized unreconciled() over tidy rows with unique (group, sex) pairs
+
+    groups holds the hash of each row's (block, country, source, area_type,
+    year) group. Returns a mask of the rows to reject.
+    """
+    sex = df['sex'].to_numpy()
+    earnings = df['earnings_ppp'].to_numpy()
+    earnings = {value: pd.Series(earnings[sex == value], index=groups[sex == value]) for value in RECONCILED_SEXES}
+
+    # Male and Female earnings aligned on the Total rows; comparisons with a
+    # missing value are False, so incomplete groups pass
+    total = earnings['Total']
+    male = earnings['Male'].reindex(total.index).to_numpy()
+    female = earnings['Female'].reindex(total.index).to_numpy()
+    low = np.minimum(male, female) * (1 - RECONCILE_TOLERANCE)
+    high = np.maximum(male, female) * (1 + RECONCILE_TOLERANCE)
+    outside = (total.to_numpy() < low) | (total.to_numpy() > high)
+    if not outside.any():
+        return np.zeros(len(df), dtype=bool)
+    return np.isin(groups, total.index[outside]) & np.isin(sex, RECONCILED_SEXES)
+
+
+def check_row(line, row, seen, rejected):
+    """Clean one raw row and check its values and key
+
+    Returns the tidy row, or None after appending [line, reason, *values] to
+    rejected. The hashes of accepted keys are added to seen.
+    """
+    if None in row:
+        rejected.append([line, f'extra fields {row[None]!r}', *(row[col] for col in CLEAN_COLUMNS)])
+        return None
+
+    try:
+        clean = clean_row(row)
+    except ValueError:
+        rejected.append([line, invalid_reason(row), *(row[col] for col in CLEAN_COLUMNS)])
+        return None
+
+    key = (clean['country'], clean['source'], clean['sex'], clean['area_type'], clean['year'])
+    problem = key_problem(key, seen)
+    if problem is not None:
+        rejected.append([line, problem, *clean.values()])
+        return None
+
+    seen.add(hash(key))
+    return clean
+
+
+def country_blocks(infile):
+    """Yield the (line, raw row) pairs of each run of rows of one country
+
+    line is the row's record number in the raw export (the header is line 1).
+    """
+    block = []
+    for line, row in enumerate(raw_reader(infile), start=2):
+        if block and row['ref_area.label'] != block[-1][1]['ref_area.label']:
+            yield block
+            block = []
+        block.append((line, row))
+    if block:
+        yield block
+
+
+def clean_block(block, rejected):
+    """Clean and validate the raw rows of one country block
+
+    Duplicate keys and unreconciled groups are only looked for within the
+    block. Returns the accepted tidy rows and appends the others to rejected
+    as [line, reason, *values] lists.
+    """
+    seen = set()
+    accepted = []
+    for line, row in block:
+        clean = check_row(line, row, seen, rejected)
+        if clean is not None:
+            accepted.append((line, clean))
+
+    dropped = unreconciled(accepted)
+    if dropped:
+        rejected += [[accepted[i][0], UNRECONCILED, *accepted[i][1].values()] for i in sorted(dropped)]
+    return [clean for i, (_, clean) in enumerate(accepted) if i not in dropped]
+
+
+def quarantine_writer(quarantine, header=True):
+    """Return a csv writer for an open quarantine file, after its header row if header is True"""
+    writer = csv.writer(quarantine)
+    if header:
+        writer.writerow(QUARANTINE_COLUMNS)
+    return writer
+
+
+def write_rejected(writer, file_name, rejected):
+    """Write the rejected rows of one block to the quarantine in line order
+
+    rejected holds [line, reason, *values] lists. Blocks are written in the
+    order of the export, so the quarantine file stays sorted by line while
+    only one block's rejected rows are held at a time. Returns the number of
+    rows written.
+    """
+    rejected.sort(key=lambda values: values[0])
+    writer.writerows([file_name, *values] for values in rejected)
+    return len(rejected)
+
+
+def clean_file(input_file, output_file, quarantine_file, header=True):
+    """Stream one raw export into a tidy CSV, validating each row as it is cleaned
+
+    Rejected rows are streamed to quarantine_file with their line, the row's
+    record number in the raw export (the header is line 1), and the reason.
+    Returns the number of rows written and rejected.
+    """
+    total = 0
+    rejected = 0
+    file_name = os.path.basename(input_file)
+
+    # Stream country blocks from the raw export straight into the cleaned output
+    with open_text(input_file, 'r') as infile, open_text(output_file, 'w') as outfile, \
+            open(quarantine_file, 'w', encoding='utf-8', newline='') as quarantine:
+        writer = csv.DictWriter(outfile, fieldnames=list(CLEAN_COLUMNS.values()))
+        if header:
+            writer.writeheader()
+        quarantined = quarantine_writer(quarantine, header)
+
+        for block in country_blocks(infile):
+            block_rejected = []
+            rows = clean_block(block, block_rejected)
+            writer.writerows(rows)
+            total += len(rows)
+            rejected += write_rejected(quarantined, file_name, block_rejected)
+
+    return total, rejected
+
+
+def parse_failures(values, convert):
+    """Return a mask of the values convert() rejects"""
+    failed = []
+    for value in values:
+        try:
+            convert(value)
+        except (TypeError, ValueError):
+            failed.append(True)
+        else:
+            failed.append(False)
+    return np.array(failed, dtype=bool)
+
+
+def parse_frame(raw):
+    """Rename a chunk of raw ILOSTAT rows and find its unparsable values
+
+    Returns the tidy frame, with year and earnings_ppp left as the raw strings
+    so astype() converts them exactly as int() and float() do, and masks of
+    the rows whose time or obs_value clean_row() would reject.
+    """
+    df = raw[list(CLEAN_COLUMNS)].rename(columns=CLEAN_COLUMNS)
+
+    # Clean area type - remove "Area type: " prefix
+    prefixed = df['area_type'].str.startswith('Area type: ')
+    df['area_type'] = df['area_type'].where(~prefixed, df['area_type'].str.replace('Area type: ', ''))
+
+    # Values that do not look numeric are checked with int() and float()
+    looks_numeric = {
+        'year': df['year'].str.fullmatch(r'\s*[+-]?[0-9]+\s*', na=False),
+        'earnings_ppp': pd.to_numeric(df['earnings_ppp'], errors='coerce').notna()
+    }
+    invalid = {}
+    for column, tidy, convert in [('time', 'year', int), ('obs_value', 'earnings_ppp', float)]:
+        mask = ~looks_numeric[tidy].to_numpy(dtype=bool, copy=True)
+        if mask.any():
+            mask[mask] = parse_failures(df[tidy].to_numpy()[mask], convert)
+        invalid[column] = pd.Series(mask, index=df.index)
+    return df, invalid
+
+
+def column_hashes(df, columns, hashes=None):
+    """Combine 64-bit hashes of the values in columns into one hash per row
+
+    Each column's distinct values are hashed once and broadcast by their
+    codes. hashes continues from the combined hashes of earlier columns.
+    """
+    if hashes is None:
+        hashes = np.zeros(len(df), dtype='uint64')
+    for column in columns:
+        codes, uniques = pd.factorize(df[column])
+        hashes = hashes * np.uint64(1_000_003) ^ pd.util.hash_array(np.asarray(uniques))[codes]
+    return hashes
+
+
+def validate_frame(raw):
+    """Clean whole country blocks of raw rows with the checks clean_block() applies row by row
+
+    Keys are compared by 64-bit hashes of their columns and of the block they
+    belong to, so duplicates and groups are only matched within a block, as
+    clean_block() matches them. Returns the accepted tidy rows and the
+    rejected rows as [line, reason, *values] lists.
+    """
+    df, invalid = parse_frame(raw)
+
+    # Number each run of rows of one country as country_blocks() splits them
+    country = raw['ref_area.label'].to_numpy()
+    blocks = np.zeros(len(country), dtype='uint64')
+    blocks[1:] = np.cumsum(country[1:] != country[:-1])
+
+    # Unparsable years or earnings, reported with their raw values
+    bad_time = invalid['time'].to_numpy()
+    unparsed = bad_time | invalid['obs_value'].to_numpy()
+    rejected = []
+    if unparsed.any():
+        rows = raw.loc[unparsed, list(CLEAN_COLUMNS)].fillna('')
+        columns = np.where(bad_time[unparsed], 'time', 'obs_value')
+        rejected = [
+            [line + 2, f'invalid {column} {row[column]!r}', *row.values()]
+            for line, column, row in zip(rows.index, columns, rows.to_dict('records'))
+        ]
+        df = df[~unparsed]
+        blocks = blocks[~unparsed]
+    df = df.astype({'year': 'int64', 'earnings_ppp': 'float64'})
 
-def process_wage_data():
-    """Process raw ILO wage data into tidy format"""
-    
-    # Input and output file paths
-    input_file = 'EAR_4MTH_SEX_GEO_CUR_NB_A-filtered-2025-06-01.csv'
-    output_file = '../ilostat_wage.csv'
-    
-    # Read the raw data
-    with open(input_file, 'r', encoding='utf-8-sig') as infile:
-        reader = csv.DictReader(infile)
-        rows = list(reader)
-    
-    # Clean column names mapping
-    clean_columns = {
-        'ref_area.label': 'country',
-        'source.label': 'source',
-        'indicator.label': 'indicator',
-        'sex.label': 'sex',
-        'classif1.label': 'area_type',
-        'classif2.label': 'currency_info',
-        'time': 'year',
-        'obs_value': 'earnings_ppp',
-        'obs_status.label': 'obs_status',
-        'note_indicator.label': 'note_indicator',
-        'note_source.label': 'note_source'
+    # Unknown labels, then keys already seen in the block
+    unknown = {
+        column: ~df[column].isin(allowed).to_numpy()
+        for column, allowed in [('sex', SEX_VALUES), ('area_type', AREA_TYPES)]
     }
-    
-    # Write cleaned data
-    with open(output_file, 'w', newline='', encoding='utf-8') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=list(clean_columns.values()))
-        writer.writeheader()
-        
-        for row in rows:
-            clean_row = {}
-            for old_col, new_col in clean_columns.items():
-                clean_row[new_col] = row[old_col]
-            
-            # Clean area type - remove "Area type: " prefix
-            if clean_row['area_type'].startswith('Area type: '):
-                clean_row['area_type'] = clean_row['area_type'].replace('Area type: ', '')
-                
-            # Convert year to integer
-            clean_row['year'] = int(clean_row['year'])
-            
-            # Convert earnings to float
-            clean_row['earnings_ppp'] = float(clean_row['earnings_ppp'])
-            
-            writer.writerow(clean_row)
-    
+    checked = ~(unknown['sex'] | unknown['area_type'])
+    groups = column_hashes(df, RECONCILE_GROUP, blocks)
+    keys = column_hashes(df, ['sex'], groups)
+    failed = ~checked | (pd.Series(keys).duplicated().to_numpy() & checked)
+    if failed.any():
+        # Failures are rare, so their reasons are worked out row by row
+        rows = df[failed]
+        rejected += [
+            [line + 2, key_problem(tuple(values[i] for i in KEY_POSITIONS), ()) or 'duplicate key', *values]
+            for line, values in zip(rows.index, rows.to_numpy(dtype=object).tolist())
+        ]
+        df, groups = df[~failed], groups[~failed]
+
+    # Groups whose Total is outside the Male-Female range
+    outside = unreconciled_frame(df, groups)
+    if outside.any():
+        rows = df[outside]
+        rejected += [
+            [line + 2, UNRECONCILED, *values]
+            for line, values in zip(rows.index, rows.to_numpy(dtype=object).tolist())
+        ]
+        df = df[~outside]
+    return df, rejected
+
+
+def quote_field(value):
+    """Quote a CSV field the way csv.writer does with QUOTE_MINIMAL"""
+    if any(ch in value for ch in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def format_rows(df):
+    """Format a tidy frame as CSV lines, byte-identical to csv.DictWriter
+
+    Each column is factorized and only its distinct values are formatted, so
+    the repeated label columns cost one string operation per distinct value.
+    """
+    columns = []
+    for col in df.columns:
+        codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+        if df[col].dtype.kind == 'f':
+            formatted = [repr(float(value)) for value in uniques]
+        elif df[col].dtype.kind in 'iu':
+            formatted = [str(int(value)) for value in uniques]
+        else:
+            formatted = [quote_field(value) for value in uniques]
+        columns.append(np.asarray(formatted, dtype=object)[codes])
+    return ''.join(','.join(fields) + '\r\n' for fields in zip(*columns))
+
+
+def frame_blocks(chunks):
+    """Regroup chunks of raw rows into frames of whole country blocks
+
+    The rows of the last country in a chunk are carried over to the next
+    one, so at most one country block is held back at a time.
+    """
+    carried = None
+    for chunk in chunks:
+        if carried is not None:
+            chunk = pd.concat([carried, chunk])
+        country = chunk['ref_area.label'].to_numpy()
+        changes = np.flatnonzero(country[1:] != country[:-1])
+        last_block = changes[-1] + 1 if len(changes) else 0
+        if last_block:
+            yield chunk.iloc[:last_block]
+        carried = chunk.iloc[last_block:]
+    if carried is not None and len(carried):
+        yield carried
+
+
+def clean_chunks(input_file, output_file, quarantine_file, header=True):
+    """Stream one raw export into a tidy CSV in chunks with pandas"""
+    total = 0
+    rejected = 0
+    file_name = os.path.basename(input_file)
+    chunks = pd.read_csv(
+        input_file,
+        encoding='utf-8-sig',
+        dtype=str,
+        keep_default_na=False,
+        index_col=False,
+        chunksize=CHUNK_ROWS
+    )
+
+    with open_text(output_file, 'w') as outfile, open(quarantine_file, 'w', encoding='utf-8', newline='') as quarantine:
+        if header:
+            csv.writer(outfile).writerow(CLEAN_COLUMNS.values())
+        quarantined = quarantine_writer(quarantine, header)
+
+        for frame in frame_blocks(chunks):
+            df, frame_rejected = validate_frame(frame)
+            outfile.write(format_rows(df))
+            total += len(df)
+            rejected += write_rejected(quarantined, file_name, frame_rejected)
+
+    return total, rejected
+
+
+def clean_file_pandas(input_file, output_file, quarantine_file, header=True):
+    """Stream one raw export into a tidy CSV with pandas
+
+    Applies the same validation and produces the same bytes and rejected rows
+    as clean_file(). The C parser stops at a record with more fields than the
+    header without saying which record it was, so such exports are cleaned by
+    clean_file() instead, which quarantines those records.
+    """
+    try:
+        with warnings.catch_warnings():
+            # A long first record is truncated with a warning rather than an error
+            warnings.simplefilter('error', pd.errors.ParserWarning)
+            return clean_chunks(input_file, output_file, quarantine_file, header)
+    except (pd.errors.ParserError, pd.errors.ParserWarning):
+        return clean_file(input_file, output_file, quarantine_file, header)
+
+
+# Row-cleaning engines selectable from the command line
+ENGINES = {
+    'python': clean_file,
+    'pandas': clean_file_pandas
+}
+
+
+def write_artifacts(output_file):
+    """Write the columnar artifact and summary cube next to the tidy CSV"""
+    # Write the compact columnar copy used by the dashboard
+    columnar_file = artifact_path(output_file, '.arrow')
+    write_columnar(output_file, columnar_file)
+    print(f'Columnar artifact saved to {columnar_file}')
+
+    # Precompute the per-country summary and gap cube
+    summary_file = artifact_path(output_file, '_summary.arrow')
+    gaps_file = artifact_path(output_file, '_gaps.arrow')
+    write_cube(output_file, summary_file, gaps_file)
+    print(f'Summary cube saved to {summary_file} and {gaps_file}')
+
+
+def report_quarantine(rejected, quarantine_file):
+    """Report the rows rejected by validation, or remove a quarantine file without any"""
+    if not rejected:
+        if os.path.exists(quarantine_file):
+            os.remove(quarantine_file)
+        return
+    print(f'Rows rejected by validation: {rejected} (quarantine: {quarantine_file})')
+
+
+def report(output_file, total, elapsed):
+    """Print the outcome and throughput of a processing run"""
     print(f'Data processed successfully. Output saved to {output_file}')
-    print(f'Total records processed: {len(rows)}')
+    print(f'Total records processed: {total}')
+    print(f'Throughput: {total / elapsed:,.0f} rows/s ({elapsed:.2f} s)')
+
+
+def process_wage_data(input_file=INPUT_FILE, output_file=OUTPUT_FILE, artifacts=True, engine='python'):
+    """Process raw ILO wage data into tidy format
+
+    engine selects the row-by-row 'python' cleaner or the chunked 'pandas'
+    one; both write identical output. Rows failing validation are written to
+    a quarantine file next to the output. The output is replaced only once
+    it is complete. When artifacts is True, the columnar copy and summary
+    cube used by the dashboard are written next to the output file. Building
+    them loads the tidy dataset into memory, so skip them for bulk exports.
+    """
+    start = time.perf_counter()
+    quarantine_file = artifact_path(output_file, '_quarantine.csv')
+    with atomic_output(output_file) as tmp_file, atomic_output(quarantine_file) as tmp_quarantine:
+        total, rejected = ENGINES[engine](input_file, tmp_file, tmp_quarantine)
+    report_quarantine(rejected, quarantine_file)
+    report(output_file, total, time.perf_counter() - start)
+
+    if artifacts:
+        write_artifacts(output_file)
+
+    return total
+
+
+def expand_inputs(inputs):
+    """Return the sorted raw export files in a directory or matching a glob"""
+    if os.path.isdir(inputs):
+        files = glob.glob(os.path.join(inputs, '*.csv')) + glob.glob(os.path.join(inputs, '*.csv.gz'))
+    else:
+        files = glob.glob(inputs)
+    return sorted(files)
+
+
+def process_wage_files(inputs, output_file=OUTPUT_FILE, workers=None, artifacts=True, engine='python'):
+    """Process many raw ILOSTAT exports in parallel into one tidy dataset
+
+    inputs is a directory, a glob pattern or a list of files. Each file is
+    cleaned into a part file by a process pool with the given number of
+    workers (default: one per CPU), then the parts are concatenated in sorted
+    file order so the output does not depend on scheduling. Each file is
+    validated on its own, so duplicate keys are only detected within a file.
+    """
+    files = expand_inputs(inputs) if isinstance(inputs, str) else sorted(inputs)
+    if not files:
+        raise FileNotFoundError(f'No raw exports found for {inputs}')
+
+    start = time.perf_counter()
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+
+    quarantine_file = artifact_path(output_file, '_quarantine.csv')
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        parts = [os.path.join(tmp_dir, f'part-{i:05d}.csv') for i in range(len(files))]
+        quarantines = [os.path.join(tmp_dir, f'part-{i:05d}_quarantine.csv') for i in range(len(files))]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(ENGINES[engine], files, parts, quarantines, [False] * len(files)))
+
+        # Merge the data and quarantine parts in input order behind a single header
+        with atomic_output(output_file) as tmp_file, atomic_output(quarantine_file) as tmp_quarantine:
+            with open_text(tmp_file, 'w') as outfile:
+                csv.writer(outfile).writerow(CLEAN_COLUMNS.values())
+                for part in parts:
+                    with open_text(part, 'r') as infile:
+                        shutil.copyfileobj(infile, outfile)
+            with open(tmp_quarantine, 'w', encoding='utf-8', newline='') as outfile:
+                quarantine_writer(outfile)
+                for part in quarantines:
+                    with open(part, 'r', encoding='utf-8', newline='') as infile:
+                        shutil.copyfileobj(infile, outfile)
+
+    report_quarantine(sum(rejected for _, rejected in results), quarantine_file)
+    total = sum(count for count, _ in results)
+    report(output_file, total, time.perf_counter() - start)
+    print(f'Files processed: {len(files)}')
+
+    if artifacts:
+        write_artifacts(output_file)
+
+    return total
+
+
+def row_key(row):
+    """Return the (country, source, sex, area_type, year) key of a raw row
+
+    An unparsable year is kept as it is, so the row is still tracked.
+    """
+    area_type = row['classif1.label']
+    if area_type.startswith('Area type: '):
+        area_type = area_type.replace('Area type: ', '')
+    try:
+        year = str(int(row['time']))
+    except ValueError:
+        year = row['time']
+    return (row['ref_area.label'], row['source.label'], row['sex.label'], area_type, year)
+
+
+def block_hashes(block, manifest):
+    """Hash the raw rows of a country block by key into manifest
+
+    Rows sharing a key are hashed together. Returns a hash of the whole block.
+    """
+    digests = []
+    for _, row in block:
+        key = row_key(row)
+        content = MANIFEST_SEPARATOR.join(row[col] for col in CLEAN_COLUMNS)
+        digest = hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+        manifest[key] = manifest[key] + digest if key in manifest else digest
+        digests.append(digest)
+    return hashlib.blake2b(''.join(digests).encode(), digest_size=16).hexdigest()
+
+
+def read_manifest(manifest_file):
+    """Read a key -> content hash manifest"""
+    with open(manifest_file, 'r', encoding='utf-8', newline='') as infile:
+        reader = csv.reader(infile)
+        next(reader)
+        return {tuple(row[:-1]): row[-1] for row in reader}
+
+
+def write_manifest(manifest, manifest_file):
+    """Write a key -> content hash manifest"""
+    with open(manifest_file, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(MANIFEST_KEY + ['hash'])
+        for key, digest in manifest.items():
+            writer.writerow(list(key) + [digest])
+
+
+def diff_manifests(old, new):
+    """Return the (change, key) pairs turning the old manifest into the new one"""
+    changes = []
+    for key, digest in new.items():
+        if key not in old:
+            changes.append(('insert', key))
+        elif old[key] != digest:
+            changes.append(('update', key))
+    changes.extend(('delete', key) for key in old if key not in new)
+    return changes
+
+
+def read_offsets(offsets_file):
+    """Read the per-country table of an incremental run"""
+    with open(offsets_file, 'r', encoding='utf-8', newline='') as infile:
+        reader = csv.reader(infile)
+        next(reader)
+        return {row[0]: (*map(int, row[1:6]), row[6], row[7]) for row in reader}
+
+
+def write_offsets(offsets, offsets_file):
+    """Write the per-country table of an incremental run"""
+    with open(offsets_file, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(OFFSET_COLUMNS)
+        for country, values in offsets.items():
+            writer.writerow([country, *values])
+
+
+def write_changelog(changes, changelog_file):
+    """Write the changes of an incremental run"""
+    with open(changelog_file, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(['change'] + MANIFEST_KEY)
+        for change, key in changes:
+            writer.writerow([change] + list(key))
+
+
+def tidy_hash(data, quarantined):
+    """Hash the tidy and quarantined bytes written for a country block"""
+    digest = hashlib.blake2b(data, digest_size=16)
+    digest.update(quarantined)
+    return digest.hexdigest()
+
+
+def rewrite_changed_countries(input_file, output_file, tmp_file, tmp_quarantine, previous):
+    """Stream a raw export into a tidy CSV, re-cleaning only changed countries
+
+    previous is the per-country table of output_file. A country block whose
+    raw rows are unchanged is copied byte for byte from output_file, and its
+    rejected rows from the quarantine file next to it, moved to the block's
+    new lines; other blocks are cleaned and validated as in a full run. The
+    new tidy CSV and quarantine file are written to tmp_file and
+    tmp_quarantine.
+
+    Returns the key -> content hash manifest and per-country table of the
+    new export, the number of rows and rejected rows and the countries that
+    were re-cleaned.
+    """
+    manifest = {}
+    offsets = {}
+    repeated = set()
+    total = 0
+    rejected = 0
+    cleaned = set()
+    file_name = os.path.basename(input_file)
+    quarantine_file = artifact_path(output_file, '_quarantine.csv')
+
+    header = ','.join(CLEAN_COLUMNS.values()).encode('utf-8') + b'\r\n'
+    quarantine_header = ','.join(QUARANTINE_COLUMNS).encode('utf-8') + b'\r\n'
+    position, quarantine_position = len(header), len(quarantine_header)
+    # Files that are never copied from are not opened
+    old_output = output_file if previous else os.devnull
+    old_quarantine = quarantine_file if previous and os.path.exists(quarantine_file) else os.devnull
+    with open_text(input_file, 'r') as infile, open(old_output, 'rb') as old, \
+            open(old_quarantine, 'rb') as old_rejected, open(tmp_file, 'wb') as outfile, \
+            open(tmp_quarantine, 'wb') as quarantine:
+        outfile.write(header)
+        quarantine.write(quarantine_header)
+        for block in country_blocks(infile):
+            country = block[0][1]['ref_area.label']
+            line = block[0][0]
+            raw_hash = block_hashes(block, manifest)
+            total += len(block)
+
+            # A country split into several blocks is re-cleaned and not tracked
+            if country in offsets or country in repeated:
+                repeated.add(country)
+                offsets.pop(country, None)
+            start, end, quarantine_start, quarantine_end, old_line, old_raw_hash, old_hash = previous.get(
+                country, (0, 0, 0, 0, 0, None, None)
+            )
+
+            block_rejected = []
+            data = None
+            if raw_hash == old_raw_hash and country not in repeated:
+                old.seek(start)
+                data = old.read(end - start)
+                old_rejected.seek(quarantine_start)
+                quarantined = old_rejected.read(quarantine_end - quarantine_start)
+                if tidy_hash(data, quarantined) == old_hash:
+                    block_rejected = [
+                        [int(old_row_line) + line - old_line, *rest]
+                        for _, old_row_line, *rest in csv.reader(io.StringIO(quarantined.decode('utf-8'), newline=''))
+                    ]
+                else:
+                    data = None
+            if data is None:
+                block_file = io.StringIO(newline='')
+                writer = csv.DictWriter(block_file, fieldnames=list(CLEAN_COLUMNS.values()))
+                writer.writerows(clean_block(block, block_rejected))
+                data = block_file.getvalue().encode('utf-8')
+                cleaned.add(country)
+
+            block_file = io.StringIO(newline='')
+            rejected += write_rejected(csv.writer(block_file), file_name, block_rejected)
+            quarantined = block_file.getvalue().encode('utf-8')
+            outfile.write(data)
+            quarantine.write(quarantined)
+            if country not in repeated:
+                offsets[country] = (
+                    position, position + len(data), quarantine_position, quarantine_position + len(quarantined),
+                    line, raw_hash, tidy_hash(data, quarantined)
+                )
+            position += len(data)
+            quarantine_position += len(quarantined)
+
+    return manifest, offsets, total, rejected, cleaned
+
+
+def update_wage_data(input_file=INPUT_FILE, output_file=OUTPUT_FILE, artifacts=True):
+    """Apply a new raw export to an existing tidy CSV incrementally
+
+    Compares the export with the manifest of (country, source, sex,
+    area_type, year) -> content hash saved by the previous run, re-cleans
+    only the countries with inserted, updated or deleted rows and writes the
+    changes to a changelog next to the output. The export is read once:
+    unchanged countries are copied from the existing output at the byte
+    ranges recorded next to the manifest, so the output and quarantine file
+    match a full run. Without a manifest or output, every country is cleaned.
+    The output must be an uncompressed CSV, since unchanged countries are
+    copied from it by byte offset; a .gz output raises ValueError before any
+    file is touched.
+    """
+    if output_file.endswith('.gz'):
+        raise ValueError(f'Incremental updates need an uncompressed output, got {output_file}')
+
+    manifest_file = artifact_path(output_file, '_manifest.csv')
+    offsets_file = artifact_path(output_file, '_offsets.csv')
+    changelog_file = artifact_path(output_file, '_changelog.csv')
+
+    start = time.perf_counter()
+    if all(os.path.exists(path) for path in [manifest_file, offsets_file, output_file]):
+        old_manifest = read_manifest(manifest_file)
+        previous = read_offsets(offsets_file)
+    else:
+        print(f'No manifest at {manifest_file}, running a full update')
+        old_manifest, previous = {}, {}
+
+    quarantine_file = artifact_path(output_file, '_quarantine.csv')
+    with atomic_output(output_file) as tmp_file, atomic_output(quarantine_file) as tmp_quarantine:
+        new_manifest, offsets, total, rejected, cleaned = rewrite_changed_countries(
+            input_file, output_file, tmp_file, tmp_quarantine, previous
+        )
+    write_manifest(new_manifest, manifest_file)
+    write_offsets(offsets, offsets_file)
+
+    changes = diff_manifests(old_manifest, new_manifest)
+    write_changelog(changes, changelog_file)
+    report_quarantine(rejected, quarantine_file)
+    if not changes:
+        print(f'No changes since the last run, {output_file} rewritten from the previous output')
+        return changes
+
+    counts = {change: sum(1 for c, _ in changes if c == change) for change in ['insert', 'update', 'delete']}
+    report(output_file, total, time.perf_counter() - start)
+    print(f'Changes: {counts["insert"]} inserted, {counts["update"]} updated, {counts["delete"]} deleted '
+          f'({len(cleaned)} countries re-cleaned, changelog: {changelog_file})')
+
+    if artifacts:
+        write_artifacts(output_file)
+
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process raw ILO wage data into tidy format')
+    parser.add_argument('--input', default=INPUT_FILE,
+                        help='raw ILOSTAT export (.csv or .csv.gz), or a directory or glob of exports')
+    parser.add_argument('--output', default=OUTPUT_FILE, help='tidy output file (.csv or .csv.gz)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes for directory or glob inputs (default: one per CPU)')
+    parser.add_argument('--engine', choices=sorted(ENGINES), default=None,
+                        help='row-by-row python cleaner (default) or chunked pandas cleaner')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only apply rows changed since the last run (single input file, .csv output)')
+    parser.add_argument('--no-artifacts', action='store_true',
+                        help='skip the columnar artifact and summary cube')
+    args = parser.parse_args()
+
+    # Incremental updates scan one export with the python cleaner and copy
+    # unchanged countries from an uncompressed output by byte offset
+    if args.incremental:
+        if not os.path.isfile(args.input):
+            parser.error('--incremental needs a single input file, not a directory or glob')
+        if args.engine is not None:
+            parser.error('--incremental always uses the python engine; --engine cannot be combined with it')
+        if args.output.endswith('.gz'):
+            parser.error('--incremental needs an uncompressed .csv output')
+    engine = args.engine or 'python'
+
+    if args.incremental:
+        update_wage_data(args.input, args.output, artifacts=not args.no_artifacts)
+    elif os.path.isfile(args.input):
+        process_wage_data(args.input, args.output, artifacts=not args.no_artifacts,
+                          engine=engine)
+    else:
+        process_wage_files(args.input, args.output, workers=args.workers,
+                           artifacts=not args.no_artifacts, engine=engine)
+
 
 if __name__ == '__main__':
-    process_wage_data()
\ No newline at end of file
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Static snapshot export of the Wage Disparity and Trends charts
+
+Renders every country's Wage Disparity and Trends charts with the dashboard's
+selection logic and chart builders, in parallel across processes, and writes
+per country a standalone HTML page and a JSON file with the summary metrics
+and Plotly figure specs. A manifest records the data hash of each country, so
+later runs only re-render countries whose data changed. The output directory
+is a static site (index.html links every country) that can be published as a
+fallback or cache in front of the live dashboard.
+
+Usage:
+    python export_snapshots.py [--output-dir snapshots] [--workers N] [--force]
+                               [--country NAME ...]
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import plotly
+
+from wage_charts import (
+    gap_trends_chart, gender_disparity_chart, gender_trends_chart,
+    regional_disparity_chart, regional_trends_chart
+)
+from wage_data import COLUMNAR_FILE, CSV_FILE, TOOL_COLUMNS, WageIndex, file_checksum, load_wage_data
+from wage_query import json_value
+from wage_summary import load_cube
+from wage_tools import select_disparity, select_trends
+
+OUTPUT_DIR = 'snapshots'
+MANIFEST_FILE = 'manifest.json'
+PLOTLY_JS = 'plotly.min.js'
+
+# Bump when the snapshot layout changes so every country is re-rendered
+SNAPSHOT_FORMAT = 1
+
+# Summary metrics shown on each snapshot page
+PAGE_METRICS = {
+    'avg_earnings': 'Average National Earnings',
+    'years_available': 'Years of Data',
+    'latest_year': 'Latest Data Year',
+    'data_points': 'Total Data Points',
+    'gender_latest_gap': 'Gender Wage Gap (%)',
+    'regional_latest_gap': 'Urban-Rural Wage Gap (%)'
+}
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+</head>
+<body>
+<h1>{title}</h1>
+{body}
+</body>
+</html>
+'''
+
+# Dataset shared by the export functions, loaded once per process
+_dataset = {}
+
+
+def load_dataset(csv_path=CSV_FILE, columnar_path=COLUMNAR_FILE):
+    """Load the lean dataset, its index and the summary cube for this process"""
+    df = load_wage_data(csv_path, columnar_path, columns=TOOL_COLUMNS)
+    summary, gaps = load_cube(df, csv_path)
+    _dataset.update(index=WageIndex(df), summary=summary.to_dict('index'), gaps=gaps)
+    return _dataset
+
+
+def slugify(country):
+    """Return a file name stem for a country"""
+    return re.sub(r'[^a-z0-9]+', '-', country.lower()).strip('-')
+
+
+def _write_text(path, text):
+    """Write a file atomically so a published snapshot is never partial"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def country_selections(country):
+    """Return the Wage Disparity and Trends selections for a country"""
+    return (
+        select_disparity(_dataset['summary'], country),
+        select_trends(_dataset['index'], _dataset['gaps'], country)
+    )
+
+
+def country_hash(country):
+    """Hash everything a country's snapshot is rendered from"""
+    disparity, trends = country_selections(country)
+    digest = hashlib.sha256(f'{SNAPSHOT_FORMAT}:{plotly.__version__}:{country}'.encode())
+    digest.update(json.dumps(
+        {key: json_value(value) for key, value in disparity['summary'].items()}, sort_keys=True
+    ).encode())
+    for frame in [disparity['gender'], disparity['regional'], *trends.values()]:
+        if frame is not None:
+            digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def country_figures(country):
+    """Build the dashboard's Wage Disparity and Trends figures for a country"""
+    disparity, trends = country_selections(country)
+    builders = [
+        ('gender_disparity', disparity['gender'], gender_disparity_chart),
+        ('regional_disparity', disparity['regional'], regional_disparity_chart),
+        ('gender_trends', trends['gender'], gender_trends_chart),
+        ('regional_trends', trends['regional'], regional_trends_chart),
+        ('gap_trends', trends['gaps'], gap_trends_chart)
+    ]
+    figures = {
+        name: build(data, country)
+        for name, data, build in builders
+        if data is not None and not data.empty
+    }
+    return disparity['summary'], figures
+
+
+def export_country(country, output_dir, data_hash):
+    """Write a country's HTML page and JSON snapshot; return its manifest entry"""
+    summary, figures = country_figures(country)
+    metrics = {key: json_value(value) for key, value in summary.items()}
+    stem = slugify(country)
+
+    snapshot = {
+        'country': country,
+        'data_hash': data_hash,
+        'summary': metrics,
+        'figures': {name: json.loads(fig.to_json()) for name, fig in figures.items()}
+    }
+    _write_text(os.path.join(output_dir, f'{stem}.json'), json.dumps(snapshot))
+
+    rows = ''.join(
+        f'<tr><th>{label}</th><td>{html.escape(str(metrics.get(key)))}</td></tr>'
+        for key, label in PAGE_METRICS.items()
+    )
+    charts = ''.join(
+        fig.to_html(full_html=False, include_plotlyjs=False) for fig in figures.values()
+    )
+    page = PAGE_TEMPLATE.format(
+        title=html.escape(f'Wage Disparities - {country}'),
+        plotly_js=PLOTLY_JS,
+        body=f'<table>{rows}</table>\n{charts}'
+    )
+    _write_text(os.path.join(output_dir, f'{stem}.html'), page)
+
+    return {'hash': data_hash, 'html': f'{stem}.html', 'json': f'{stem}.json'}
+
+
+def _export_task(args):
+    """Process pool entry point"""
+    return args[0], export_country(*args)
+
+
+def read_manifest(output_dir):
+    """Return the previous export's manifest, or an empty one"""
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {'countries': {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_index(output_dir, countries):
+    """Write index.html linking every country's snapshot"""
+    items = ''.join(
+        f'<li><a href="{entry["html"]}">{html.escape(country)}</a></li>'
+        for country, entry in sorted(countries.items())
+    )
+    page = PAGE_TEMPLATE.format(
+        title='Wage Disparity Snapshots', plotly_js=PLOTLY_JS, body=f'<ul>{items}</ul>'
+    )
+    _write_text(os.path.join(output_dir, 'index.html'), page)
+
+
+def export_snapshots(output_dir=OUTPUT_DIR, workers=None, force=False, countries=None,
+                     csv_path=CSV_FILE, columnar_path=COLUMNAR_FILE):
+    """Export every country's snapshot, skipping countries whose data is unchanged
+
+    countries limits the export to a subset; snapshots of other countries
+    stay as they are. Returns (exported, skipped, removed) country counts.
+    """
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    load_dataset(csv_path, columnar_path)
+
+    available = _dataset['index'].countries
+    unknown = sorted(set(countries or []) - set(available))
+    if unknown:
+        raise ValueError(f'Unknown countries: {", ".join(unknown)}')
+
+    manifest = read_manifest(output_dir)
+    previous = manifest['countries']
+    hashes = {country: country_hash(country) for country in (countries or available)}
+
+    def is_current(country):
+        entry = previous.get(country)
+        return (
+            not force and entry is not None and entry['hash'] == hashes[country] and
+            all(os.path.exists(os.path.join(output_dir, entry[kind])) for kind in ['html', 'json'])
+        )
+
+    entries = {
+        country: entry for country, entry in previous.items()
+        if country in available and (country not in hashes or is_current(country))
+    }
+    pending = [(country, output_dir, hashes[country]) for country in hashes if country not in entries]
+
+    # Every page loads the shared bundle, so refresh it with the Plotly version
+    plotly_js = os.path.join(output_dir, PLOTLY_JS)
+    if force or manifest.get('plotly_version') != plotly.__version__ or not os.path.exists(plotly_js):
+        _write_text(plotly_js, plotly.offline.get_plotlyjs())
+
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=load_dataset, initargs=(csv_path, columnar_path)
+        ) as pool:
+            entries.update(pool.map(_export_task, pending, chunksize=max(1, len(pending) // 32)))
+
+    # Drop snapshots of countries no longer in the dataset
+    removed = [country for country in previous if country not in available]
+    for country in removed:
+        for kind in ['html', 'json']:
+            path = os.path.join(output_dir, previous[country][kind])
+            if os.path.exists(path):
+                os.remove(path)
+
+    write_index(output_dir, entries)
+    manifest = {
+        'data_version': file_checksum(csv_path),
+        'format': SNAPSHOT_FORMAT,
+        'plotly_version': plotly.__version__,
+        'countries': dict(sorted(entries.items()))
+    }
+    _write_text(os.path.join(output_dir, MANIFEST_FILE), json.dumps(manifest, indent=2))
+
+    elapsed = time.perf_counter() - start
+    print(f'Snapshots written to: {output_dir}')
+    print(f'Countries exported: {len(pending)}, unchanged: {len(hashes) - len(pending)}, '
+          f'removed: {len(removed)} in {elapsed:.2f} s')
+    return len(pending), len(hashes) - len(pending), len(removed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export static Wage Disparity and Trends snapshots')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help='directory for the snapshot site')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--country', action='append', dest='countries',
+                        help='export only this country (repeatable)')
+    parser.add_argument('--force', action='store_true', help='re-render every country')
+    args = parser.parse_args()
+
+    export_snapshots(args.output_dir, workers=args.workers, force=args.force, countries=args.countries)
+
+
+if __name__ == '__main__':
+    main()
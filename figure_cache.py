@@ -0,0 +1,61 @@
+"""
+Bounded LRU cache for Plotly figures shared across dashboard sessions
+
+Figures are keyed on the tool, chart, filter state and dataset version, so a
+rerun with unchanged filters reuses the figure built by any earlier session
+instead of rebuilding it. Cached figures are shared and must not be mutated
+after they are built.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class FigureCache:
+    """Thread-safe least-recently-used cache with hit/miss/eviction counters"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """Return the cached figure for key, calling build() on a miss"""
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return self._figures[key]
+            self.misses += 1
+
+        # Build outside the lock so slow figures do not block other sessions
+        figure = build()
+
+        with self._lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+                self.evictions += 1
+        return figure
+
+    def clear(self):
+        """Drop every cached figure, keeping the counters"""
+        with self._lock:
+            self._figures.clear()
+
+    def stats(self):
+        """Return the cache size and counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._figures),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,246 @@
+"""
+Opt-in timing instrumentation for the dashboard
+
+Set WAGE_METRICS=1 to time each named stage of each tool (loading, data
+selection, figure building, chart serialization and the whole rerun) and to
+count cache hits and misses. Results are available as p50/p95 per stage in
+the sidebar, as a Prometheus text endpoint on WAGE_METRICS_PORT, and as one
+JSON log line per rerun with WAGE_METRICS_LOG=1. With metrics enabled, adding
+?profile=1 to the dashboard URL captures a cProfile of that rerun.
+
+When WAGE_METRICS is unset every hook is a no-op.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Most recent durations kept per (tool, stage) for percentiles
+WINDOW = 1024
+
+PROMETHEUS_PREFIX = 'wage_dashboard'
+
+
+def percentile(ordered, q):
+    """Return the q-th quantile of a sorted list of samples"""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class Metrics:
+    """Stage timings and cache counters shared by every session of a process"""
+
+    def __init__(self, enabled=False, log=False):
+        self.enabled = enabled
+        self.log = log
+        self._samples = defaultdict(lambda: deque(maxlen=WINDOW))
+        self._totals = defaultdict(lambda: [0, 0.0])
+        self._cache_calls = defaultdict(int)
+        self._cache_misses = defaultdict(int)
+        self._cache_sources = {}
+        self._rerun = threading.local()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environ(cls):
+        """Configure metrics from WAGE_METRICS and WAGE_METRICS_LOG"""
+        return cls(
+            enabled=os.environ.get('WAGE_METRICS', '0') == '1',
+            log=os.environ.get('WAGE_METRICS_LOG', '0') == '1'
+        )
+
+    def observe(self, tool, stage, seconds):
+        """Record one duration for a tool stage"""
+        key = (tool, stage)
+        with self._lock:
+            self._samples[key].append(seconds)
+            totals = self._totals[key]
+            totals[0] += 1
+            totals[1] += seconds
+        stages = getattr(self._rerun, 'stages', None)
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def stage(self, tool, stage):
+        """Time a block as one stage of a tool"""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(tool, stage)
+
+    @contextmanager
+    def _timed(self, tool, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(tool, stage, time.perf_counter() - start)
+
+    def start_rerun(self):
+        """Begin collecting the stages of the current script run"""
+        if self.enabled:
+            self._rerun.started = time.perf_counter()
+            self._rerun.stages = {}
+
+    def end_rerun(self, tool):
+        """Record the current script run's total and log its stages"""
+        stages = getattr(self._rerun, 'stages', None)
+        if not self.enabled or stages is None:
+            return
+        self._rerun.stages = None
+        elapsed = time.perf_counter() - self._rerun.started
+        self.observe(tool, 'rerun', elapsed)
+        if self.log:
+            print(json.dumps({
+                'event': 'rerun',
+                'tool': tool,
+                'seconds': round(elapsed, 6),
+                'stages': {name: round(seconds, 6) for name, seconds in stages.items()}
+            }))
+
+    def cached(self, name, cache):
+        """Apply a Streamlit cache decorator, counting calls and misses
+
+        Misses are counted inside the cached function, which only runs when
+        the cache has no entry. The returned function keeps the cache's
+        clear() method.
+        """
+        def decorate(fn):
+            if not self.enabled:
+                return cache(fn)
+
+            @functools.wraps(fn)
+            def build(*args, **kwargs):
+                with self._lock:
+                    self._cache_misses[name] += 1
+                return fn(*args, **kwargs)
+
+            cached_fn = cache(build)
+
+            @functools.wraps(fn)
+            def lookup(*args, **kwargs):
+                with self._lock:
+                    self._cache_calls[name] += 1
+                return cached_fn(*args, **kwargs)
+
+            lookup.clear = cached_fn.clear
+            return lookup
+        return decorate
+
+    def register_cache(self, name, stats):
+        """Report a cache exposing stats() with 'hits' and 'misses'"""
+        self._cache_sources[name] = stats
+
+    def cache_stats(self):
+        """Return {cache: {'hits', 'misses', 'hit_rate'}}"""
+        with self._lock:
+            counts = {
+                name: (calls - self._cache_misses[name], self._cache_misses[name])
+                for name, calls in self._cache_calls.items()
+            }
+        for name, stats in self._cache_sources.items():
+            current = stats()
+            counts[name] = (current['hits'], current['misses'])
+        return {
+            name: {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+            for name, (hits, misses) in counts.items()
+        }
+
+    def snapshot(self):
+        """Return count, total, p50 and p95 per (tool, stage)"""
+        with self._lock:
+            samples = {key: sorted(values) for key, values in self._samples.items()}
+            totals = {key: tuple(values) for key, values in self._totals.items()}
+        return [
+            {
+                'tool': tool,
+                'stage': stage,
+                'count': totals[(tool, stage)][0],
+                'sum_s': totals[(tool, stage)][1],
+                'p50_s': percentile(ordered, 0.5),
+                'p95_s': percentile(ordered, 0.95)
+            }
+            for (tool, stage), ordered in sorted(samples.items())
+        ]
+
+    def prometheus(self):
+        """Render stage summaries and cache counters in Prometheus text format"""
+        name = f'{PROMETHEUS_PREFIX}_stage_seconds'
+        lines = [
+            f'# HELP {name} Duration of dashboard tool stages',
+            f'# TYPE {name} summary'
+        ]
+        for row in self.snapshot():
+            labels = f'tool="{row["tool"]}",stage="{row["stage"]}"'
+            lines += [
+                f'{name}{{{labels},quantile="0.5"}} {row["p50_s"]:.6f}',
+                f'{name}{{{labels},quantile="0.95"}} {row["p95_s"]:.6f}',
+                f'{name}_sum{{{labels}}} {row["sum_s"]:.6f}',
+                f'{name}_count{{{labels}}} {row["count"]}'
+            ]
+
+        for counter in ['hits', 'misses']:
+            name = f'{PROMETHEUS_PREFIX}_cache_{counter}_total'
+            lines += [f'# HELP {name} Cache {counter} per cache', f'# TYPE {name} counter']
+            lines += [
+                f'{name}{{cache="{cache}"}} {stats[counter]}'
+                for cache, stats in self.cache_stats().items()
+            ]
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='0.0.0.0'):
+        """Serve prometheus() at /metrics from a background thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class RerunProfile:
+    """cProfile capture of a single script run"""
+
+    def __init__(self, directory='profiles'):
+        self.directory = directory
+        self.profiler = cProfile.Profile()
+        self.path = None
+
+    def start(self):
+        self.profiler.enable()
+        return self
+
+    def stop(self, limit=25):
+        """Stop profiling, save the .prof file and return the top functions"""
+        self.profiler.disable()
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f'rerun-{time.strftime("%Y%m%d-%H%M%S")}.prof')
+        self.profiler.dump_stats(self.path)
+
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats('cumulative').print_stats(limit)
+        return output.getvalue()
+
+
+# One collector per dashboard process
+METRICS = Metrics.from_environ()
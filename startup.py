@@ -0,0 +1,72 @@
+"""
+Startup timing for the dashboard
+
+Records how long a dashboard process spends importing modules and loading
+data the first time each is needed, the memory taken by the loaded frames,
+and how long its first script run took to render, so cold-start cost can be
+tracked between releases. The report is printed to the server log after the
+first render; set STARTUP_REPORT=0 to silence it.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """First-occurrence phase timings for the current process"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_render_s = None
+        self.phases = {}
+        self.memory = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block, keeping only its first (cold) duration"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases.setdefault(name, elapsed)
+
+    def record_memory(self, name, nbytes):
+        """Record the size of a loaded frame, keeping its first measurement"""
+        with self._lock:
+            self.memory.setdefault(name, nbytes)
+
+    def mark_rendered(self):
+        """Record the time to first render, once per process"""
+        with self._lock:
+            if self.first_render_s is not None:
+                return
+            self.first_render_s = time.perf_counter() - self.started
+        if os.environ.get('STARTUP_REPORT', '1') != '0':
+            print(self.format())
+
+    def as_dict(self):
+        """Return the report as JSON-serializable data"""
+        with self._lock:
+            return {
+                'first_render_s': self.first_render_s,
+                'phases': dict(self.phases),
+                'memory_bytes': dict(self.memory)
+            }
+
+    def format(self):
+        """Return the report as log lines"""
+        report = self.as_dict()
+        lines = [f"⏱️  First render in {report['first_render_s']:.3f} s"]
+        lines += [f'  {name:<28} {seconds:8.3f} s' for name, seconds in report['phases'].items()]
+        lines += [f'  {name:<28} {nbytes / 1e6:8.3f} MB' for name, nbytes in report['memory_bytes'].items()]
+        return '\n'.join(lines)
+
+
+# One report per dashboard process; Streamlit reruns the script but imports
+# this module once
+REPORT = StartupReport()
@@ -1,9 +1,12 @@
+from startup import REPORT
+
+import os
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import numpy as np
+from figure_cache import FigureCache
+from instrumentation import METRICS, RerunProfile
+
+METRICS.start_rerun()
 
 # Set page config
 st.set_page_config(
@@ -13,14 +16,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Load data
-@st.cache_data
-def load_data():
-    """Load the ILO wage statistics data"""
-    return pd.read_csv("ilostat_wage.csv")
-
-# Load the data
-df = load_data()
+# With metrics enabled, ?profile=1 captures a cProfile of this run
+profile = None
+if METRICS.enabled and st.query_params.get('profile') == '1':
+    profile = RerunProfile(os.environ.get('WAGE_PROFILE_DIR', 'profiles')).start()
 
 # Title and description
 st.title("💰 Wage Disparity Dashboard")
@@ -33,22 +32,145 @@ focusing on gender and regional differences in earnings across countries and tim
 st.sidebar.title("Navigation")
 tool_selection = st.sidebar.radio(
     "Select Tool:",
-    ["Wage Disparity Tool", "Trends Tool", "Comparison Tool"]
+    ["Wage Disparity Tool", "Trends Tool", "Comparison Tool", "Ranking Tool"]
 )
 
+# Data modules pull in pandas and pyarrow, so they are imported once the
+# page shell has been sent
+with REPORT.phase('import data modules'):
+    import pandas as pd
+    from wage_data import (
+        CSV_FILE, NOTE_COLUMNS, TOOL_COLUMNS, DataVersion, WageIndex, frame_bytes, load_wage_data
+    )
+    from wage_summary import load_cube
+    from wage_tools import COMPARISON_TRACE_LIMIT, select_comparison, select_disparity, select_ranking, select_trends
+
+# Lean mode loads only the columns the tools read; set LEAN_DATA=0 to keep
+# the note and status columns in the main frame
+LEAN_DATA = os.environ.get('LEAN_DATA', '1') != '0'
+
+# Default for the Trends Tool's browser-side year range; set
+# CLIENT_YEAR_RANGE=1 to send full series and filter years in the browser
+CLIENT_YEAR_RANGE = os.environ.get('CLIENT_YEAR_RANGE', '0') == '1'
+
+# Load data; each loader is keyed on the dataset version so a rewritten CSV
+# is never served from an older cache entry
+@METRICS.cached('dataset', st.cache_data)
+def load_data(version):
+    """Load the ILO wage statistics data"""
+    df = load_wage_data(columns=TOOL_COLUMNS if LEAN_DATA else None)
+    REPORT.record_memory('dataset', frame_bytes(df))
+    return df
+
+@METRICS.cached('notes', st.cache_data)
+def load_notes(version):
+    """Load the note and status columns, aligned on index with load_data()"""
+    notes = load_wage_data(columns=NOTE_COLUMNS)
+    REPORT.record_memory('notes', frame_bytes(notes))
+    return notes
+
+@METRICS.cached('index', st.cache_resource)
+def load_index(version):
+    """Build the (country, sex, area_type, year) lookup shared by all tools"""
+    with REPORT.phase('load dataset and index'):
+        return WageIndex(load_data(version))
+
+@METRICS.cached('summary_cube', st.cache_data)
+def load_summary_cube(version):
+    """Load the per-country summary and gap cube built by the ETL
+
+    The summary is returned as a country -> metrics dict for keyed lookups.
+    The full dataset is only read when the cube has to be rebuilt.
+    """
+    with REPORT.phase('load summary cube'):
+        summary, gaps = load_cube()
+        return summary.to_dict('index'), gaps
+
+@METRICS.cached('ranking', st.cache_data)
+def load_ranking(gap_type, years, version):
+    """Rank every country for one gap type and year window"""
+    _, gaps = load_summary_cube(version)
+    return select_ranking(gaps, gap_type, years)
+
+@st.cache_resource
+def load_data_version():
+    """Track the dataset version shared by all sessions"""
+    return DataVersion(CSV_FILE)
+
+@st.cache_resource
+def load_figure_cache():
+    """Create the figure cache shared by all sessions"""
+    return FigureCache(maxsize=int(os.environ.get('FIGURE_CACHE_SIZE', 256)))
+
+def refresh_data_version():
+    """Return the current dataset version, dropping caches built for older ones
+
+    The file is only rehashed when its mtime or size changes. A new version
+    is used for the whole script run that first sees it.
+    """
+    version, changed = load_data_version().refresh()
+    if changed:
+        for loader in [load_data, load_notes, load_index, load_summary_cube, load_ranking]:
+            loader.clear()
+        load_figure_cache().clear()
+    return version
+
+def year_range_controls(fig, enabled):
+    """Add a range slider so the year range is adjusted in the browser"""
+    if enabled:
+        fig.update_xaxes(rangeslider_visible=True)
+    return fig
+
+@st.cache_resource
+def start_metrics_endpoint():
+    """Serve Prometheus metrics on WAGE_METRICS_PORT, once per process"""
+    port = os.environ.get('WAGE_METRICS_PORT')
+    return METRICS.serve(int(port)) if port else None
+
+def build_figure(key, build):
+    """Return a cached figure for the current tool, timing lookup and build"""
+    with METRICS.stage(tool_selection, 'figure'):
+        return figures.get_or_build(key, build)
+
+def show_chart(fig):
+    """Send a figure to the browser, timing its serialization"""
+    with METRICS.stage(tool_selection, 'serialize'):
+        st.plotly_chart(fig, use_container_width=True)
+
+def load_plotly():
+    """Import plotly.express and the shared chart builders for the first chart"""
+    with REPORT.phase('import plotly'):
+        import plotly.express as px
+        import wage_charts
+    return px, wage_charts
+
+# Shared by every tool; each tool loads the data it needs below
+with METRICS.stage(tool_selection, 'load'):
+    data_version = refresh_data_version()
+    summary, gaps = load_summary_cube(data_version)
+figures = load_figure_cache()
+px, charts = load_plotly()
+
+if METRICS.enabled:
+    METRICS.register_cache('figures', figures.stats)
+    start_metrics_endpoint()
+
 # Tool 1: Wage Disparity Tool
 if tool_selection == "Wage Disparity Tool":
     st.header("🔍 Wage Disparity Analysis")
     st.markdown("Select a country to analyze wage disparities by gender and region.")
     
-    # Country selection
-    countries = sorted(df['country'].unique())
+    # Country selection; this tool only needs the summary cube
+    countries = list(summary)
     selected_country = st.selectbox("Select Country:", countries)
     
-    # Filter data for selected country
-    country_data = df[df['country'] == selected_country]
+    # Summary cube lookups for selected country
+    with METRICS.stage(tool_selection, 'select'):
+        disparity = select_disparity(summary, selected_country)
     
-    if not country_data.empty:
+    if disparity is not None:
+        country_summary = disparity['summary']
+        
         # Create two columns for the charts
         col1, col2 = st.columns(2)
         
@@ -56,35 +178,24 @@ if tool_selection == "Wage Disparity Tool":
             st.subheader("👥 Gender Wage Disparity")
             
             # Gender disparity chart
-            gender_data = country_data[
-                (country_data['sex'].isin(['Male', 'Female'])) & 
-                (country_data['area_type'] == 'National') &
-                (country_data['earnings_ppp'].notna())
-            ]
-            
-            if not gender_data.empty:
-                # Get the latest year with data for both genders
-                latest_year_data = gender_data.groupby('year').filter(lambda x: len(x) == 2).tail(2)
+            if country_summary['gender_observations'] > 0:
+                # Latest year with data for both genders
+                latest_year_data = disparity['gender']
                 
-                if not latest_year_data.empty:
-                    fig_gender = px.bar(
-                        latest_year_data,
-                        x='sex',
-                        y='earnings_ppp',
-                        title=f"Gender Wage Disparity - {selected_country}",
-                        labels={'earnings_ppp': 'Monthly Earnings (2021 PPP $)', 'sex': 'Gender'},
-                        color='sex',
-                        color_discrete_map={'Male': '#1f77b4', 'Female': '#ff7f0e'}
+                if latest_year_data is not None:
+                    fig_gender = build_figure(
+                        ('Wage Disparity Tool', 'gender', selected_country, data_version),
+                        lambda: charts.gender_disparity_chart(latest_year_data, selected_country)
                     )
                     
-                    # Calculate wage gap
-                    male_earnings = latest_year_data[latest_year_data['sex'] == 'Male']['earnings_ppp'].iloc[0]
-                    female_earnings = latest_year_data[latest_year_data['sex'] == 'Female']['earnings_ppp'].iloc[0]
-                    wage_gap = ((male_earnings - female_earnings) / male_earnings) * 100
+                    wage_gap = country_summary['gender_latest_gap']
                     
-                    st.plotly_chart(fig_gender, use_container_width=True)
+                    show_chart(fig_gender)
                     st.metric("Gender Wage Gap", f"{wage_gap:.1f}%", 
                              help="Percentage difference between male and female earnings")
+                    st.caption(
+                        f"{country_summary['gender_latest_year']} · {country_summary['gender_latest_source']}"
+                    )
                 else:
                     st.warning("No gender comparison data available for this country")
             else:
@@ -94,35 +205,24 @@ if tool_selection == "Wage Disparity Tool":
             st.subheader("🏙️ Regional Wage Disparity")
             
             # Regional disparity chart
-            regional_data = country_data[
-                (country_data['area_type'].isin(['Urban', 'Rural'])) & 
-                (country_data['sex'] == 'Total') &
-                (country_data['earnings_ppp'].notna())
-            ]
-            
-            if not regional_data.empty:
-                # Get the latest year with data for both regions
-                latest_regional_data = regional_data.groupby('year').filter(lambda x: len(x) == 2).tail(2)
+            if country_summary['regional_observations'] > 0:
+                # Latest year with data for both regions
+                latest_regional_data = disparity['regional']
                 
-                if not latest_regional_data.empty:
-                    fig_regional = px.bar(
-                        latest_regional_data,
-                        x='area_type',
-                        y='earnings_ppp',
-                        title=f"Regional Wage Disparity - {selected_country}",
-                        labels={'earnings_ppp': 'Monthly Earnings (2021 PPP $)', 'area_type': 'Area Type'},
-                        color='area_type',
-                        color_discrete_map={'Urban': '#2ca02c', 'Rural': '#d62728'}
+                if latest_regional_data is not None:
+                    fig_regional = build_figure(
+                        ('Wage Disparity Tool', 'regional', selected_country, data_version),
+                        lambda: charts.regional_disparity_chart(latest_regional_data, selected_country)
                     )
                     
-                    # Calculate regional gap
-                    urban_earnings = latest_regional_data[latest_regional_data['area_type'] == 'Urban']['earnings_ppp'].iloc[0]
-                    rural_earnings = latest_regional_data[latest_regional_data['area_type'] == 'Rural']['earnings_ppp'].iloc[0]
-                    regional_gap = ((urban_earnings - rural_earnings) / urban_earnings) * 100
+                    regional_gap = country_summary['regional_latest_gap']
                     
-                    st.plotly_chart(fig_regional, use_container_width=True)
+                    show_chart(fig_regional)
                     st.metric("Urban-Rural Wage Gap", f"{regional_gap:.1f}%",
                              help="Percentage difference between urban and rural earnings")
+                    st.caption(
+                        f"{country_summary['regional_latest_year']} · {country_summary['regional_latest_source']}"
+                    )
                 else:
                     st.warning("No regional comparison data available for this country")
             else:
@@ -133,19 +233,19 @@ if tool_selection == "Wage Disparity Tool":
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            avg_earnings = country_data[country_data['sex'] == 'Total']['earnings_ppp'].mean()
+            avg_earnings = country_summary['avg_earnings']
             st.metric("Average National Earnings", f"${avg_earnings:.0f}")
         
         with col2:
-            years_available = country_data['year'].nunique()
+            years_available = country_summary['years_available']
             st.metric("Years of Data", years_available)
         
         with col3:
-            latest_year = country_data['year'].max()
+            latest_year = country_summary['latest_year']
             st.metric("Latest Data Year", latest_year)
         
         with col4:
-            data_points = len(country_data)
+            data_points = country_summary['data_points']
             st.metric("Total Data Points", data_points)
     
     else:
@@ -157,29 +257,37 @@ elif tool_selection == "Trends Tool":
     st.markdown("Analyze wage disparity trends over time for a selected country.")
     
     # Country selection
-    countries = sorted(df['country'].unique())
+    with METRICS.stage(tool_selection, 'load index'):
+        index = load_index(data_version)
+    countries = index.countries
     selected_country = st.selectbox("Select Country:", countries)
     
-    # Filter data for selected country
-    country_data = df[df['country'] == selected_country]
-    
-    if not country_data.empty:
-        # Year range selection
-        min_year = int(country_data['year'].min())
-        max_year = int(country_data['year'].max())
-        
-        year_range = st.slider(
-            "Select Year Range:",
-            min_value=min_year,
-            max_value=max_year,
-            value=(min_year, max_year)
+    # Summary cube row for selected country
+    if selected_country in summary:
+        # Year range selection, on the server or in the browser
+        client_range = st.toggle(
+            "Filter years in the browser",
+            value=CLIENT_YEAR_RANGE,
+            help="Send each country's full series once and adjust the year range "
+                 "with the range slider under each chart, without reloading the page"
         )
         
-        # Filter by year range
-        filtered_data = country_data[
-            (country_data['year'] >= year_range[0]) & 
-            (country_data['year'] <= year_range[1])
-        ]
+        if client_range:
+            year_range = None
+        else:
+            min_year = summary[selected_country]['first_year']
+            max_year = summary[selected_country]['latest_year']
+            
+            year_range = st.slider(
+                "Select Year Range:",
+                min_value=min_year,
+                max_value=max_year,
+                value=(min_year, max_year)
+            )
+        
+        # Series for the selected period, or all years in browser mode
+        with METRICS.stage(tool_selection, 'select'):
+            trends = select_trends(index, gaps, selected_country, year_range)
         
         # Create two columns for trend charts
         col1, col2 = st.columns(2)
@@ -188,23 +296,16 @@ elif tool_selection == "Trends Tool":
             st.subheader("👥 Gender Wage Trends")
             
             # Gender trends
-            gender_trends = filtered_data[
-                (filtered_data['sex'].isin(['Male', 'Female'])) & 
-                (filtered_data['area_type'] == 'National') &
-                (filtered_data['earnings_ppp'].notna())
-            ]
+            gender_trends = trends['gender']
             
             if not gender_trends.empty:
-                fig_gender_trends = px.line(
-                    gender_trends,
-                    x='year',
-                    y='earnings_ppp',
-                    color='sex',
-                    title=f"Gender Wage Trends - {selected_country}",
-                    labels={'earnings_ppp': 'Monthly Earnings (2021 PPP $)', 'year': 'Year'},
-                    markers=True
+                fig_gender_trends = build_figure(
+                    ('Trends Tool', 'gender', selected_country, year_range, data_version),
+                    lambda: year_range_controls(
+                        charts.gender_trends_chart(gender_trends, selected_country), client_range
+                    )
                 )
-                st.plotly_chart(fig_gender_trends, use_container_width=True)
+                show_chart(fig_gender_trends)
             else:
                 st.warning("No gender trend data available for the selected period")
         
@@ -212,76 +313,45 @@ elif tool_selection == "Trends Tool":
             st.subheader("🏙️ Regional Wage Trends")
             
             # Regional trends
-            regional_trends = filtered_data[
-                (filtered_data['area_type'].isin(['Urban', 'Rural'])) & 
-                (filtered_data['sex'] == 'Total') &
-                (filtered_data['earnings_ppp'].notna())
-            ]
+            regional_trends = trends['regional']
             
             if not regional_trends.empty:
-                fig_regional_trends = px.line(
-                    regional_trends,
-                    x='year',
-                    y='earnings_ppp',
-                    color='area_type',
-                    title=f"Regional Wage Trends - {selected_country}",
-                    labels={'earnings_ppp': 'Monthly Earnings (2021 PPP $)', 'year': 'Year'},
-                    markers=True
+                fig_regional_trends = build_figure(
+                    ('Trends Tool', 'regional', selected_country, year_range, data_version),
+                    lambda: year_range_controls(
+                        charts.regional_trends_chart(regional_trends, selected_country), client_range
+                    )
                 )
-                st.plotly_chart(fig_regional_trends, use_container_width=True)
+                show_chart(fig_regional_trends)
             else:
                 st.warning("No regional trend data available for the selected period")
         
         # Wage gap trends
         st.subheader("📊 Wage Gap Trends")
         
-        # Calculate gender wage gap over time
-        gender_gap_data = []
-        for year in filtered_data['year'].unique():
-            year_data = filtered_data[
-                (filtered_data['year'] == year) & 
-                (filtered_data['area_type'] == 'National') &
-                (filtered_data['sex'].isin(['Male', 'Female']))
-            ]
-            
-            if len(year_data) == 2:
-                male_earnings = year_data[year_data['sex'] == 'Male']['earnings_ppp'].iloc[0]
-                female_earnings = year_data[year_data['sex'] == 'Female']['earnings_ppp'].iloc[0]
-                wage_gap = ((male_earnings - female_earnings) / male_earnings) * 100
-                gender_gap_data.append({'year': year, 'wage_gap': wage_gap, 'type': 'Gender Gap'})
-        
-        # Calculate regional wage gap over time
-        regional_gap_data = []
-        for year in filtered_data['year'].unique():
-            year_data = filtered_data[
-                (filtered_data['year'] == year) & 
-                (filtered_data['sex'] == 'Total') &
-                (filtered_data['area_type'].isin(['Urban', 'Rural']))
-            ]
-            
-            if len(year_data) == 2:
-                urban_earnings = year_data[year_data['area_type'] == 'Urban']['earnings_ppp'].iloc[0]
-                rural_earnings = year_data[year_data['area_type'] == 'Rural']['earnings_ppp'].iloc[0]
-                regional_gap = ((urban_earnings - rural_earnings) / urban_earnings) * 100
-                regional_gap_data.append({'year': year, 'wage_gap': regional_gap, 'type': 'Regional Gap'})
-        
-        # Combine gap data
-        all_gap_data = gender_gap_data + regional_gap_data
-        
-        if all_gap_data:
-            gap_df = pd.DataFrame(all_gap_data)
-            fig_gaps = px.line(
-                gap_df,
-                x='year',
-                y='wage_gap',
-                color='type',
-                title=f"Wage Gap Trends - {selected_country}",
-                labels={'wage_gap': 'Wage Gap (%)', 'year': 'Year'},
-                markers=True
+        # Gender and regional gaps for the selected period
+        gap_df = trends['gaps']
+        
+        if not gap_df.empty:
+            fig_gaps = build_figure(
+                ('Trends Tool', 'gaps', selected_country, year_range, data_version),
+                lambda: year_range_controls(
+                    charts.gap_trends_chart(gap_df, selected_country), client_range
+                )
             )
-            st.plotly_chart(fig_gaps, use_container_width=True)
+            show_chart(fig_gaps)
         else:
             st.warning("No wage gap trend data available for the selected period")
+        
+        # Observation status and notes, loaded only when requested
+        if st.checkbox("Show data notes"):
+            observations = pd.concat([trends['gender'], trends['regional']]).sort_values(['year', 'sex', 'area_type'])
+            notes = load_notes(data_version)
+            st.dataframe(
+                observations[['year', 'source', 'sex', 'area_type']].join(notes),
+                hide_index=True,
+                use_container_width=True
+            )
     
     else:
         st.error("No data available for the selected country")
@@ -289,120 +359,247 @@ elif tool_selection == "Trends Tool":
 # Tool 3: Comparison Tool
 elif tool_selection == "Comparison Tool":
     st.header("🔄 Country Comparison")
-    st.markdown("Compare wage disparities between two countries over time.")
+    st.markdown("Compare wage disparities between countries over time.")
     
     # Country selection
-    countries = sorted(df['country'].unique())
+    with METRICS.stage(tool_selection, 'load index'):
+        index = load_index(data_version)
+    countries = index.countries
     
-    col1, col2 = st.columns(2)
-    with col1:
-        country1 = st.selectbox("Select First Country:", countries, key="country1")
-    with col2:
-        country2 = st.selectbox("Select Second Country:", countries, key="country2")
+    selected_countries = st.multiselect(
+        "Select Countries:",
+        countries,
+        default=countries[:2]
+    )
     
-    if country1 != country2:
-        # Filter data for both countries
-        comparison_data = df[df['country'].isin([country1, country2])]
+    if len(selected_countries) >= 2:
+        with METRICS.stage(tool_selection, 'select'):
+            comparison = select_comparison(index, summary, gaps, selected_countries)
+        # Titles and tables follow the selection order, so the cache key does too
+        selection_key = tuple(selected_countries)
         
-        if not comparison_data.empty:
-            # Create comparison charts
-            st.subheader("📊 Average Wage Comparison")
-            
-            # National average wages over time
-            national_data = comparison_data[
-                (comparison_data['sex'] == 'Total') & 
-                (comparison_data['area_type'] == 'National') &
-                (comparison_data['earnings_ppp'].notna())
-            ]
-            
-            if not national_data.empty:
-                fig_comparison = px.line(
+        if comparison['aggregated']:
+            selection_label = f"{len(selected_countries)} Countries"
+            st.info(
+                f"Showing per-year quartiles across the {len(selected_countries)} selected countries; "
+                f"select {COMPARISON_TRACE_LIMIT} or fewer to plot each country."
+            )
+        else:
+            selection_label = " vs ".join(selected_countries)
+        
+        # Create comparison charts
+        st.subheader("📊 Average Wage Comparison")
+        
+        # National average wages over time
+        national_data = comparison['national']
+        
+        if not national_data.empty:
+            fig_comparison = build_figure(
+                ('Comparison Tool', 'national', selection_key, data_version),
+                lambda: px.line(
                     national_data,
                     x='year',
                     y='earnings_ppp',
                     color='country',
-                    title=f"National Average Wages: {country1} vs {country2}",
+                    title=f"National Average Wages: {selection_label}",
                     labels={'earnings_ppp': 'Monthly Earnings (2021 PPP $)', 'year': 'Year'},
                     markers=True
                 )
-                st.plotly_chart(fig_comparison, use_container_width=True)
-            
-            # Gender comparison
-            st.subheader("👥 Gender Wage Comparison")
-            
-            gender_comparison = comparison_data[
-                (comparison_data['sex'].isin(['Male', 'Female'])) & 
-                (comparison_data['area_type'] == 'National') &
-                (comparison_data['earnings_ppp'].notna())
-            ]
-            
-            if not gender_comparison.empty:
-                fig_gender_comparison = px.line(
+            )
+            show_chart(fig_comparison)
+        
+        # Gender comparison
+        st.subheader("👥 Gender Wage Comparison")
+        
+        gender_comparison = comparison['gender']
+        
+        if not gender_comparison.empty:
+            fig_gender_comparison = build_figure(
+                ('Comparison Tool', 'gender', selection_key, data_version),
+                lambda: px.line(
                     gender_comparison,
                     x='year',
                     y='earnings_ppp',
                     color='country',
                     facet_col='sex',
-                    title=f"Gender Wage Comparison: {country1} vs {country2}",
+                    title=f"Gender Wage Comparison: {selection_label}",
                     labels={'earnings_ppp': 'Monthly Earnings (2021 PPP $)', 'year': 'Year'},
                     markers=True
                 )
-                st.plotly_chart(fig_gender_comparison, use_container_width=True)
-            
-            # Regional comparison
-            st.subheader("🏙️ Regional Wage Comparison")
-            
-            regional_comparison = comparison_data[
-                (comparison_data['area_type'].isin(['Urban', 'Rural'])) & 
-                (comparison_data['sex'] == 'Total') &
-                (comparison_data['earnings_ppp'].notna())
-            ]
-            
-            if not regional_comparison.empty:
-                fig_regional_comparison = px.line(
+            )
+            show_chart(fig_gender_comparison)
+        
+        # Regional comparison
+        st.subheader("🏙️ Regional Wage Comparison")
+        
+        regional_comparison = comparison['regional']
+        
+        if not regional_comparison.empty:
+            fig_regional_comparison = build_figure(
+                ('Comparison Tool', 'regional', selection_key, data_version),
+                lambda: px.line(
                     regional_comparison,
                     x='year',
                     y='earnings_ppp',
                     color='country',
                     facet_col='area_type',
-                    title=f"Regional Wage Comparison: {country1} vs {country2}",
+                    title=f"Regional Wage Comparison: {selection_label}",
                     labels={'earnings_ppp': 'Monthly Earnings (2021 PPP $)', 'year': 'Year'},
                     markers=True
                 )
-                st.plotly_chart(fig_regional_comparison, use_container_width=True)
-            
-            # Summary statistics comparison
-            st.subheader("📈 Summary Statistics")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown(f"**{country1}**")
-                country1_data = comparison_data[comparison_data['country'] == country1]
-                avg_earnings_1 = country1_data[country1_data['sex'] == 'Total']['earnings_ppp'].mean()
-                years_1 = country1_data['year'].nunique()
-                latest_year_1 = country1_data['year'].max()
-                
-                st.metric("Average Earnings", f"${avg_earnings_1:.0f}")
-                st.metric("Years of Data", years_1)
-                st.metric("Latest Data Year", latest_year_1)
-            
-            with col2:
-                st.markdown(f"**{country2}**")
-                country2_data = comparison_data[comparison_data['country'] == country2]
-                avg_earnings_2 = country2_data[country2_data['sex'] == 'Total']['earnings_ppp'].mean()
-                years_2 = country2_data['year'].nunique()
-                latest_year_2 = country2_data['year'].max()
-                
-                st.metric("Average Earnings", f"${avg_earnings_2:.0f}")
-                st.metric("Years of Data", years_2)
-                st.metric("Latest Data Year", latest_year_2)
+            )
+            show_chart(fig_regional_comparison)
         
-        else:
-            st.error("No data available for the selected countries")
+        # Wage gap comparison
+        st.subheader("📉 Wage Gap Comparison")
+        
+        gap_comparison = comparison['gaps']
+        
+        if not gap_comparison.empty:
+            fig_gap_comparison = build_figure(
+                ('Comparison Tool', 'gaps', selection_key, data_version),
+                lambda: px.line(
+                    gap_comparison,
+                    x='year',
+                    y='wage_gap',
+                    color='country',
+                    facet_col='type',
+                    title=f"Wage Gap Comparison: {selection_label}",
+                    labels={'wage_gap': 'Wage Gap (%)', 'year': 'Year'},
+                    markers=True
+                )
+            )
+            show_chart(fig_gap_comparison)
+        
+        # Summary statistics comparison
+        st.subheader("📈 Summary Statistics")
+        
+        st.dataframe(
+            comparison['summary'],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'country': st.column_config.TextColumn("Country"),
+                'avg_earnings': st.column_config.NumberColumn("Average Earnings", format="$%.0f"),
+                'years_available': st.column_config.NumberColumn("Years of Data"),
+                'first_year': st.column_config.NumberColumn("First Data Year", format="%d"),
+                'latest_year': st.column_config.NumberColumn("Latest Data Year", format="%d"),
+                'data_points': st.column_config.NumberColumn("Total Data Points"),
+                'gender_latest_gap': st.column_config.NumberColumn("Gender Wage Gap (%)", format="%.1f"),
+                'regional_latest_gap': st.column_config.NumberColumn("Urban-Rural Wage Gap (%)", format="%.1f")
+            }
+        )
+    
+    else:
+        st.warning("Please select at least two countries for comparison")
+
+# Tool 4: Ranking Tool
+elif tool_selection == "Ranking Tool":
+    st.header("🏆 Country Rankings")
+    st.markdown("Rank every country by its latest wage gap within a period.")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        gap_type = st.selectbox("Select Wage Gap:", ["Gender Gap", "Regional Gap"])
+    with col2:
+        # Year range selection across all countries
+        min_year = int(min(metrics['first_year'] for metrics in summary.values()))
+        max_year = int(max(metrics['latest_year'] for metrics in summary.values()))
+        year_range = st.slider(
+            "Select Year Range:",
+            min_value=min_year,
+            max_value=max_year,
+            value=(min_year, max_year)
+        )
     
+    # League table from the latest gap of each country in the period
+    with METRICS.stage(tool_selection, 'select'):
+        ranking = load_ranking(gap_type, year_range, data_version)
+    
+    if not ranking.empty:
+        st.subheader(f"📋 {gap_type} League Table")
+        st.caption(f"{len(ranking)} countries · latest year with a gap in {year_range[0]}–{year_range[1]}")
+        st.dataframe(
+            ranking,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'rank': st.column_config.NumberColumn("Rank"),
+                'country': st.column_config.TextColumn("Country"),
+                'source': st.column_config.TextColumn("Source"),
+                'year': st.column_config.NumberColumn("Year", format="%d"),
+                'reference_earnings': st.column_config.NumberColumn("Reference Earnings", format="$%.0f"),
+                'comparison_earnings': st.column_config.NumberColumn("Comparison Earnings", format="$%.0f"),
+                'wage_gap': st.column_config.NumberColumn("Wage Gap (%)", format="%.1f"),
+                'mean_gap': st.column_config.NumberColumn("Mean Gap in Period (%)", format="%.1f"),
+                'gap_years': st.column_config.NumberColumn("Years in Period")
+            }
+        )
+        
+        st.subheader("📊 Wage Gap by Country")
+        fig_ranking = build_figure(
+            ('Ranking Tool', 'ranking', gap_type, year_range, data_version),
+            lambda: px.bar(
+                ranking,
+                x='wage_gap',
+                y='country',
+                orientation='h',
+                color='wage_gap',
+                color_continuous_scale='RdBu_r',
+                color_continuous_midpoint=0,
+                hover_data=['rank', 'year', 'source'],
+                title=f"{gap_type} Ranking ({year_range[0]}–{year_range[1]})",
+                labels={'wage_gap': 'Wage Gap (%)', 'country': 'Country'}
+            ).update_layout(
+                height=max(400, 20 * len(ranking)),
+                yaxis={'categoryorder': 'total ascending'}
+            )
+        )
+        show_chart(fig_ranking)
     else:
-        st.warning("Please select two different countries for comparison")
+        st.warning("No wage gap data available for the selected period")
+
+REPORT.mark_rendered()
+
+# Startup timings for this process
+with st.sidebar.expander("⏱️ Startup"):
+    startup = REPORT.as_dict()
+    st.caption(
+        f"First render {startup['first_render_s']:.2f} s · " + " · ".join(
+            f"{name} {seconds:.2f} s" for name, seconds in startup['phases'].items()
+        )
+    )
+
+# Stage timings and cache hit rates, when metrics are enabled
+if METRICS.enabled:
+    with st.sidebar.expander("📈 Metrics"):
+        stages = METRICS.snapshot()
+        if stages:
+            st.dataframe(
+                [
+                    {
+                        'Tool': row['tool'],
+                        'Stage': row['stage'],
+                        'Runs': row['count'],
+                        'p50 (ms)': round(row['p50_s'] * 1000, 2),
+                        'p95 (ms)': round(row['p95_s'] * 1000, 2)
+                    }
+                    for row in stages
+                ],
+                hide_index=True
+            )
+        st.caption(" · ".join(
+            f"{name} hit rate {stats['hit_rate']:.0%}" for name, stats in METRICS.cache_stats().items()
+        ))
+
+# Figure cache statistics
+with st.sidebar.expander("⚙️ Figure Cache"):
+    cache_stats = figures.stats()
+    st.caption(
+        f"{cache_stats['size']}/{cache_stats['maxsize']} figures · "
+        f"{cache_stats['hits']} hits · {cache_stats['misses']} misses · "
+        f"{cache_stats['evictions']} evictions · hit rate {cache_stats['hit_rate']:.0%}"
+    )
 
 # Footer
 st.markdown("---")
@@ -410,4 +607,11 @@ st.markdown("""
 **Data Source:** International Labour Organization (ILO) Statistics Database  
 **Dataset:** Average monthly earnings of employees by sex and rural/urban areas  
 **Currency:** 2021 PPP $ (Purchasing Power Parity adjusted US Dollars)
-""")
\ No newline at end of file
+""")
+
+METRICS.end_rerun(tool_selection)
+
+if profile is not None:
+    with st.expander("🔬 Profile of this run"):
+        st.code(profile.stop())
+        st.caption(f"Saved to {profile.path}")
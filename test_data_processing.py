@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the data processing pipeline in data-raw/
+"""
+
+import csv
+import filecmp
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data-raw'))
+
+import data_processing as dp
+
+
+def read_raw_rows():
+    """Read the raw export as a list of dicts"""
+    with dp.open_text(dp.INPUT_FILE, 'r') as infile:
+        return list(csv.DictReader(infile))
+
+
+def write_raw_rows(rows, path):
+    """Write raw rows in the ILOSTAT export layout"""
+    with open(path, 'w', encoding='utf-8', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_gzip_round_trip():
+    """Test that a gzip export streams into a gzip output matching ilostat_wage.csv"""
+    with open(dp.OUTPUT_FILE, 'r', encoding='utf-8', newline='') as infile:
+        expected = infile.read()
+
+    with tempfile.TemporaryDirectory() as tmp_dir, redirect_stdout(io.StringIO()):
+        export = os.path.join(tmp_dir, 'export.csv.gz')
+        with open(dp.INPUT_FILE, 'rb') as infile, gzip.open(export, 'wb') as outfile:
+            shutil.copyfileobj(infile, outfile)
+
+        output = os.path.join(tmp_dir, 'tidy.csv.gz')
+        total = dp.process_wage_data(export, output, artifacts=False)
+        with dp.open_text(output, 'r') as infile:
+            assert infile.read() == expected
+    print(f"✅ Gzip export streamed to a gzip output: {total} rows")
+
+
+def test_batch_files():
+    """Test that batch mode over split exports matches a single-file run"""
+    rows = read_raw_rows()
+
+    # Split at country boundaries into three files, the last one gzip-compressed
+    countries = list(dict.fromkeys(row['ref_area.label'] for row in rows))
+    splits = [countries[len(countries) // 3], countries[2 * len(countries) // 3]]
+    starts = [0] + [next(i for i, row in enumerate(rows) if row['ref_area.label'] == c) for c in splits] + [len(rows)]
+
+    # One rejected row in the first and the last file
+    rows[5]['obs_value'] = 'n/a'
+    rows[starts[2] + 1]['time'] = '20x5'
+
+    with tempfile.TemporaryDirectory() as tmp_dir, redirect_stdout(io.StringIO()):
+        input_dir = os.path.join(tmp_dir, 'raw')
+        os.mkdir(input_dir)
+        for i, (start, end) in enumerate(zip(starts, starts[1:])):
+            write_raw_rows(rows[start:end], os.path.join(input_dir, f'part-{i}.csv'))
+        with open(os.path.join(input_dir, 'part-2.csv'), 'rb') as infile:
+            with gzip.open(os.path.join(input_dir, 'part-2.csv.gz'), 'wb') as outfile:
+                shutil.copyfileobj(infile, outfile)
+        os.remove(os.path.join(input_dir, 'part-2.csv'))
+
+        single = os.path.join(tmp_dir, 'single.csv')
+        export = os.path.join(tmp_dir, 'export.csv')
+        write_raw_rows(rows, export)
+        dp.process_wage_data(export, single, artifacts=False)
+        for engine in dp.ENGINES:
+            batch = os.path.join(tmp_dir, f'batch-{engine}.csv')
+            dp.process_wage_files(input_dir, batch, workers=2, artifacts=False, engine=engine)
+            assert filecmp.cmp(batch, single, shallow=False)
+
+            # Each worker's quarantine part is merged in file order
+            with open(dp.artifact_path(batch, '_quarantine.csv'), encoding='utf-8', newline='') as infile:
+                rejected = [row[:3] for row in csv.reader(infile)]
+            assert rejected == [
+                dp.QUARANTINE_COLUMNS[:3],
+                ['part-0.csv', '7', "invalid obs_value 'n/a'"],
+                ['part-2.csv.gz', '3', "invalid time '20x5'"]
+            ]
+    print(f"✅ Batch mode over {len(starts) - 1} files matches the single-file run")
+
+
+def test_incremental_update():
+    """Test that an incremental update matches a full run on the new export"""
+    rows = read_raw_rows()
+    rows[-5]['obs_value'] = 'n/a'
+
+    # New vintage: one update, one deletion and two inserts, so the rows of
+    # later countries (and their rejected row) move down a line
+    changed = [dict(row) for row in rows]
+    changed[10]['obs_value'] = '999.5'
+    del changed[20]
+    changed.insert(30, dict(changed[30], time='2025'))
+    changed.insert(31, dict(changed[31], time='2026'))
+
+    with tempfile.TemporaryDirectory() as tmp_dir, redirect_stdout(io.StringIO()):
+        old_export = os.path.join(tmp_dir, 'old.csv')
+        new_export = os.path.join(tmp_dir, 'new.csv')
+        write_raw_rows(rows, old_export)
+        write_raw_rows(changed, new_export)
+
+        incremental = os.path.join(tmp_dir, 'incremental.csv')
+        full = os.path.join(tmp_dir, 'full.csv')
+        dp.update_wage_data(old_export, incremental, artifacts=False)
+        assert dp.update_wage_data(old_export, incremental, artifacts=False) == []
+
+        changes = dp.update_wage_data(new_export, incremental, artifacts=False)
+        dp.process_wage_data(new_export, full, artifacts=False)
+
+        assert sorted(change for change, _ in changes) == ['delete', 'insert', 'insert', 'update']
+        assert filecmp.cmp(incremental, full, shallow=False)
+        assert filecmp.cmp(
+            dp.artifact_path(incremental, '_quarantine.csv'),
+            dp.artifact_path(full, '_quarantine.csv'),
+            shallow=False
+        )
+
+        # A gzip output is refused before any file is written
+        compressed = os.path.join(tmp_dir, 'compressed.csv.gz')
+        try:
+            dp.update_wage_data(new_export, compressed, artifacts=False)
+        except ValueError as e:
+            assert 'uncompressed' in str(e)
+        else:
+            raise AssertionError('Incremental update accepted a gzip output')
+        assert not any(name.startswith('compressed') for name in os.listdir(tmp_dir))
+    print(f"✅ Incremental update matches full run: {len(changes)} changes applied")
+
+
+def test_engines_identical():
+    """Test that the pandas engine writes the same bytes as the python engine"""
+    rows = read_raw_rows()
+
+    # Awkward values: quotes, commas, newlines, empty notes and extreme numbers
+    rows[0]['note_source.label'] = 'Repository: "ILO", micro data\nprocessing'
+    rows[1]['obs_status.label'] = ''
+    rows[2]['obs_value'] = '1e-07'
+    rows[3]['obs_value'] = '12345678901234567890'
+    rows[4]['obs_value'] = 'NaN'
+
+    # Values that int() and float() parse differently from pd.to_numeric()
+    rows[5]['obs_value'] = '64778491027943237e-15'
+    rows[6]['obs_value'] = '1_000.5'
+    rows[7]['time'] = '2020.0'
+    rows[8]['time'] = ' 2_0_2_1 '
+
+    with tempfile.TemporaryDirectory() as tmp_dir, redirect_stdout(io.StringIO()):
+        export = os.path.join(tmp_dir, 'export.csv')
+        write_raw_rows(rows, export)
+
+        outputs = {}
+        for engine in dp.ENGINES:
+            outputs[engine] = os.path.join(tmp_dir, f'{engine}.csv.gz')
+            dp.process_wage_data(export, outputs[engine], artifacts=False, engine=engine)
+
+        with dp.open_text(outputs['python'], 'r') as python_out, dp.open_text(outputs['pandas'], 'r') as pandas_out:
+            assert python_out.read() == pandas_out.read()
+        assert filecmp.cmp(
+            dp.artifact_path(outputs['python'], '_quarantine.csv'),
+            dp.artifact_path(outputs['pandas'], '_quarantine.csv'),
+            shallow=False
+        )
+
+    print(f"✅ Engines produce identical output for {len(rows)} rows")
+
+
+def test_validation():
+    """Test that invalid rows are quarantined and the output is replaced atomically"""
+    rows = read_raw_rows()
+
+    # Afghanistan LFS 2020 National: Total far above Male and Female (lines 2, 5, 8)
+    rows[0]['obs_value'] = '2000'
+    rows[1]['obs_value'] = 'n/a'
+    rows[12]['time'] = '20x5'
+    rows[13]['sex.label'] = 'Unknown'
+    rows[14]['classif1.label'] = 'Area type: Suburban'
+    rows.insert(21, dict(rows[20]))
+    expected = {
+        2: 'Total outside the Male-Female range',
+        3: "invalid obs_value 'n/a'",
+        5: 'Total outside the Male-Female range',
+        8: 'Total outside the Male-Female range',
+        14: "invalid time '20x5'",
+        15: "unknown sex 'Unknown'",
+        16: "unknown area_type 'Suburban'",
+        23: 'duplicate key'
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir, redirect_stdout(io.StringIO()):
+        export = os.path.join(tmp_dir, 'export.csv')
+        write_raw_rows(rows, export)
+
+        quarantines = {}
+        for engine in dp.ENGINES:
+            output = os.path.join(tmp_dir, f'{engine}.csv')
+            total = dp.process_wage_data(export, output, artifacts=False, engine=engine)
+            assert total == len(rows) - len(expected)
+
+            with open(dp.artifact_path(output, '_quarantine.csv'), encoding='utf-8', newline='') as infile:
+                quarantines[engine] = infile.read()
+            rejected = list(csv.DictReader(io.StringIO(quarantines[engine])))
+            assert {int(row['line']): row['reason'] for row in rejected} == expected
+            assert all(row['file'] == 'export.csv' for row in rejected)
+        assert quarantines['python'] == quarantines['pandas']
+        assert filecmp.cmp(os.path.join(tmp_dir, 'python.csv'), os.path.join(tmp_dir, 'pandas.csv'), shallow=False)
+
+        # Country blocks carried over between small chunks give the same result
+        chunk_rows = dp.CHUNK_ROWS
+        dp.CHUNK_ROWS = 7
+        try:
+            dp.process_wage_data(export, os.path.join(tmp_dir, 'pandas.csv'), artifacts=False, engine='pandas')
+        finally:
+            dp.CHUNK_ROWS = chunk_rows
+        with open(os.path.join(tmp_dir, 'pandas_quarantine.csv'), encoding='utf-8', newline='') as infile:
+            assert infile.read() == quarantines['python']
+        assert filecmp.cmp(os.path.join(tmp_dir, 'python.csv'), os.path.join(tmp_dir, 'pandas.csv'), shallow=False)
+
+        # Incremental updates reject the same rows as a full run
+        incremental_dir = os.path.join(tmp_dir, 'incremental')
+        os.mkdir(incremental_dir)
+        clean_export = os.path.join(incremental_dir, 'clean.csv')
+        write_raw_rows(read_raw_rows(), clean_export)
+        incremental = os.path.join(incremental_dir, 'incremental.csv')
+        dp.update_wage_data(clean_export, incremental, artifacts=False)
+        dp.update_wage_data(export, incremental, artifacts=False)
+        assert filecmp.cmp(incremental, os.path.join(tmp_dir, 'python.csv'), shallow=False)
+        with open(dp.artifact_path(incremental, '_quarantine.csv'), encoding='utf-8', newline='') as infile:
+            assert infile.read() == quarantines['python']
+        shutil.rmtree(incremental_dir)
+
+        # A failed run leaves the previous output in place and no temporary file
+        output = os.path.join(tmp_dir, 'python.csv')
+        with open(output, 'rb') as infile:
+            previous = infile.read()
+        try:
+            dp.process_wage_data(os.path.join(tmp_dir, 'missing.csv'), output, artifacts=False)
+        except FileNotFoundError:
+            pass
+        else:
+            raise AssertionError('Missing input was not reported')
+        with open(output, 'rb') as infile:
+            assert infile.read() == previous
+        assert sorted(os.listdir(tmp_dir)) == [
+            'export.csv', 'pandas.csv', 'pandas_quarantine.csv', 'python.csv', 'python_quarantine.csv'
+        ]
+
+        # Records with an extra field or missing fields get the same reason from both engines
+        with open(dp.INPUT_FILE, 'r', encoding='utf-8-sig', newline='') as infile:
+            records = list(csv.reader(infile))
+        for long_line in [2, 40]:
+            malformed = [list(record) for record in records]
+            malformed[long_line - 1].append('stray')
+            malformed[30] = malformed[30][:6]
+            with open(export, 'w', encoding='utf-8', newline='') as outfile:
+                csv.writer(outfile).writerows(malformed)
+
+            quarantines = {}
+            for engine in dp.ENGINES:
+                output = os.path.join(tmp_dir, f'{engine}.csv')
+                dp.process_wage_data(export, output, artifacts=False, engine=engine)
+                with open(dp.artifact_path(output, '_quarantine.csv'), encoding='utf-8', newline='') as infile:
+                    quarantines[engine] = infile.read()
+            rejected = list(csv.DictReader(io.StringIO(quarantines['python'])))
+            assert {int(row['line']): row['reason'] for row in rejected} == {
+                long_line: "extra fields ['stray']",
+                31: "invalid time ''"
+            }
+            assert quarantines['python'] == quarantines['pandas']
+            assert filecmp.cmp(os.path.join(tmp_dir, 'python.csv'), os.path.join(tmp_dir, 'pandas.csv'), shallow=False)
+
+        # A clean run removes the stale quarantine file
+        write_raw_rows(read_raw_rows(), export)
+        dp.process_wage_data(export, output, artifacts=False)
+        assert not os.path.exists(dp.artifact_path(output, '_quarantine.csv'))
+    print(f"✅ Validation quarantined {len(expected)} rows identically in both engines")
+
+
+def main():
+    print("🧪 Testing Data Processing Pipeline")
+    print("=" * 50)
+
+    test_gzip_round_trip()
+    test_batch_files()
+    test_incremental_update()
+    test_engines_identical()
+    test_validation()
+
+    print("\n✅ All data processing tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Chart builders for the Wage Disparity and Trends tools
+
+Each function turns the frames returned by wage_tools into a Plotly figure,
+so the dashboard and the static snapshot export draw the same charts.
+"""
+
+import plotly.express as px
+
+EARNINGS_LABEL = 'Monthly Earnings (2021 PPP $)'
+
+
+def gender_disparity_chart(data, country):
+    """Bar chart of the latest male and female earnings"""
+    return px.bar(
+        data,
+        x='sex',
+        y='earnings_ppp',
+        title=f"Gender Wage Disparity - {country}",
+        labels={'earnings_ppp': EARNINGS_LABEL, 'sex': 'Gender'},
+        color='sex',
+        color_discrete_map={'Male': '#1f77b4', 'Female': '#ff7f0e'}
+    )
+
+
+def regional_disparity_chart(data, country):
+    """Bar chart of the latest urban and rural earnings"""
+    return px.bar(
+        data,
+        x='area_type',
+        y='earnings_ppp',
+        title=f"Regional Wage Disparity - {country}",
+        labels={'earnings_ppp': EARNINGS_LABEL, 'area_type': 'Area Type'},
+        color='area_type',
+        color_discrete_map={'Urban': '#2ca02c', 'Rural': '#d62728'}
+    )
+
+
+def gender_trends_chart(data, country):
+    """Line chart of male and female earnings over time"""
+    return px.line(
+        data,
+        x='year',
+        y='earnings_ppp',
+        color='sex',
+        title=f"Gender Wage Trends - {country}",
+        labels={'earnings_ppp': EARNINGS_LABEL, 'year': 'Year'},
+        markers=True
+    )
+
+
+def regional_trends_chart(data, country):
+    """Line chart of urban and rural earnings over time"""
+    return px.line(
+        data,
+        x='year',
+        y='earnings_ppp',
+        color='area_type',
+        title=f"Regional Wage Trends - {country}",
+        labels={'earnings_ppp': EARNINGS_LABEL, 'year': 'Year'},
+        markers=True
+    )
+
+
+def gap_trends_chart(data, country):
+    """Line chart of the gender and regional wage gaps over time"""
+    return px.line(
+        data,
+        x='year',
+        y='wage_gap',
+        color='type',
+        title=f"Wage Gap Trends - {country}",
+        labels={'wage_gap': 'Wage Gap (%)', 'year': 'Year'},
+        markers=True
+    )
@@ -0,0 +1,245 @@
+"""
+Data access helpers for the ILO wage statistics dataset
+
+Loads the tidy dataset produced by data-raw/data_processing.py. The compact
+columnar artifact (Arrow IPC, dictionary-encoded strings) is memory-mapped when
+it is present and matches the CSV it was built from; otherwise the CSV is parsed
+and converted to the same compact dtypes. WageIndex provides the shared
+(country, sex, area_type, year) lookup used by the dashboard tools, and
+DataVersion tracks which version of the CSV is current.
+"""
+
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+CSV_FILE = 'ilostat_wage.csv'
+COLUMNAR_FILE = 'ilostat_wage.arrow'
+
+# Repeated string columns stored as dictionary-encoded categoricals
+CATEGORICAL_COLUMNS = [
+    'country',
+    'source',
+    'indicator',
+    'sex',
+    'area_type',
+    'currency_info',
+    'obs_status',
+    'note_indicator',
+    'note_source'
+]
+
+# Columns the dashboard tools read; lean loads keep only these
+TOOL_COLUMNS = ['country', 'source', 'sex', 'area_type', 'year', 'earnings_ppp']
+
+# Descriptive columns no tool reads, loaded on demand as a side table
+NOTE_COLUMNS = ['indicator', 'currency_info', 'obs_status', 'note_indicator', 'note_source']
+
+NUMERIC_DTYPES = {
+    'year': 'int16',
+    'earnings_ppp': 'float32'
+}
+
+# Schema metadata key holding the checksum of the source CSV
+CHECKSUM_KEY = b'source_sha256'
+
+
+def file_checksum(path):
+    """Return the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    """Return a file's (mtime_ns, size), a cheap check for changes"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def to_compact(df):
+    """Convert string columns to categoricals and downcast numeric columns"""
+    dtypes = {col: 'category' for col in CATEGORICAL_COLUMNS if col in df.columns}
+    dtypes.update({col: dtype for col, dtype in NUMERIC_DTYPES.items() if col in df.columns})
+    return df.astype(dtypes)
+
+
+def write_arrow(df, path, checksum, tags=None):
+    """Write a frame as an Arrow IPC file tagged with its source checksum
+
+    tags maps extra metadata keys (bytes) to values (bytes) describing how the
+    file was built; read_arrow() can require them to match.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata.update(tags or {})
+    metadata[CHECKSUM_KEY] = checksum.encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write to a temporary file first so readers never see a partial artifact
+    tmp_path = f'{path}.tmp'
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_arrow(path, checksum=None, columns=None, tags=None):
+    """Memory-map an Arrow IPC file written by write_arrow()
+
+    Returns None when the file is missing or, if a checksum is given, when it
+    was built from a different version of the source CSV, or when any of the
+    given tags differs. Only the given columns are converted to pandas when
+    columns is set.
+    """
+    if not os.path.exists(path):
+        return None
+
+    reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+    metadata = reader.schema.metadata or {}
+    if checksum is not None and metadata.get(CHECKSUM_KEY, b'').decode() != checksum:
+        return None
+    if any(metadata.get(key) != value for key, value in (tags or {}).items()):
+        return None
+
+    table = reader.read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas()
+
+
+def write_columnar(csv_path=CSV_FILE, columnar_path=COLUMNAR_FILE):
+    """Build the columnar artifact for a tidy CSV file"""
+    df = to_compact(pd.read_csv(csv_path))
+    return write_arrow(df, columnar_path, file_checksum(csv_path))
+
+
+def load_wage_data(csv_path=CSV_FILE, columnar_path=COLUMNAR_FILE, columns=None):
+    """Load the wage dataset, preferring an up-to-date columnar artifact
+
+    columns restricts the load to a subset, such as TOOL_COLUMNS for a lean
+    frame or NOTE_COLUMNS for its side table. Rows keep the same order and
+    index whatever the subset, so frames loaded separately align on index.
+    """
+    df = read_arrow(columnar_path, checksum=file_checksum(csv_path), columns=columns)
+    if df is None:
+        df = to_compact(pd.read_csv(csv_path, usecols=columns))
+        if columns is not None:
+            df = df[columns]
+    return df
+
+
+def frame_bytes(df):
+    """Return a frame's memory footprint in bytes, including string data"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _as_list(value):
+    """Wrap a scalar selector in a list, leaving lists and None untouched"""
+    if value is None or isinstance(value, (list, tuple, set)):
+        return value
+    return [value]
+
+
+class WageIndex:
+    """Row lookup over the wage dataset keyed on (country, sex, area_type, year)
+
+    Row positions are sorted once by (country, sex, area_type, year) and each
+    (country, sex, area_type) block is recorded as a range of offsets, so a
+    selection is a dictionary lookup plus a binary search on year instead of a
+    scan over the whole table. Selections keep the original row order.
+    """
+
+    def __init__(self, df):
+        self.data = df
+        keys = pd.DataFrame({
+            'country': df['country'].astype(str).to_numpy(),
+            'sex': df['sex'].astype(str).to_numpy(),
+            'area_type': df['area_type'].astype(str).to_numpy(),
+            'year': df['year'].to_numpy()
+        })
+        keys = keys.sort_values(['country', 'sex', 'area_type', 'year'], kind='stable')
+        self._order = keys.index.to_numpy()
+        self._years = keys['year'].to_numpy()
+
+        # country -> {(sex, area_type): (start, stop)} into the sorted positions
+        block_ids = keys.groupby(['country', 'sex', 'area_type'], sort=False).ngroup().to_numpy()
+        starts = np.flatnonzero(np.r_[True, block_ids[1:] != block_ids[:-1]])
+        stops = np.r_[starts[1:], len(block_ids)]
+        block_keys = keys[['country', 'sex', 'area_type']].to_numpy()
+        self._offsets = {}
+        for start, stop in zip(starts, stops):
+            country, sex, area_type = block_keys[start]
+            self._offsets.setdefault(country, {})[(sex, area_type)] = (start, stop)
+
+        self.countries = sorted(self._offsets)
+
+    def positions(self, country, sex=None, area_type=None, years=None):
+        """Return the sorted row positions matching the selection
+
+        country, sex and area_type accept a single value or a list; None
+        matches every value. years is an inclusive (min, max) tuple.
+        """
+        sexes = _as_list(sex)
+        area_types = _as_list(area_type)
+        blocks = []
+        for c in _as_list(country):
+            for (s, a), (start, stop) in self._offsets.get(c, {}).items():
+                if sexes is not None and s not in sexes:
+                    continue
+                if area_types is not None and a not in area_types:
+                    continue
+                if years is not None:
+                    block_years = self._years[start:stop]
+                    start, stop = (
+                        start + block_years.searchsorted(years[0], side='left'),
+                        start + block_years.searchsorted(years[1], side='right')
+                    )
+                blocks.append(self._order[start:stop])
+
+        if not blocks:
+            return self._order[:0]
+        positions = np.concatenate(blocks)
+        positions.sort()
+        return positions
+
+    def select(self, country, sex=None, area_type=None, years=None):
+        """Return the rows matching the selection, in original row order"""
+        return self.data.iloc[self.positions(country, sex, area_type, years)]
+
+
+class DataVersion:
+    """Content version of a data file, rehashed only when its fingerprint changes
+
+    refresh() stats the file on every call and computes the SHA-256 checksum
+    only when the (mtime_ns, size) fingerprint differs from the last call, so
+    polling it once per request is cheap.
+    """
+
+    def __init__(self, path=CSV_FILE):
+        self.path = path
+        self.fingerprint = None
+        self.checksum = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Return (checksum, changed) for the file's current contents
+
+        changed is True when the checksum differs from the one returned by the
+        previous call; the first call never reports a change.
+        """
+        fingerprint = file_fingerprint(self.path)
+        with self._lock:
+            if fingerprint == self.fingerprint:
+                return self.checksum, False
+            checksum = file_checksum(self.path)
+            changed = self.checksum is not None and checksum != self.checksum
+            self.fingerprint, self.checksum = fingerprint, checksum
+            return checksum, changed
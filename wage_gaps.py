@@ -0,0 +1,205 @@
+"""
+Wage gap computation for the ILO wage statistics dataset
+
+Computes gender (Male vs Female, national) and regional (Urban vs Rural, both
+sexes) wage gaps for every country, source and year in a single grouped pass.
+Gaps are expressed as the percentage by which the comparison group earns less
+than the reference group.
+"""
+
+import numpy as np
+import pandas as pd
+
+GENDER_GAP = 'Gender Gap'
+REGIONAL_GAP = 'Regional Gap'
+
+# gap type -> (dimension, reference, comparison, fixed column, fixed value)
+GAP_DEFINITIONS = {
+    GENDER_GAP: ('sex', 'Male', 'Female', 'area_type', 'National'),
+    REGIONAL_GAP: ('area_type', 'Urban', 'Rural', 'sex', 'Total')
+}
+
+# Rules latest_complete() can use to choose between sources
+TIE_BREAKS = ('latest', 'priority')
+
+GAP_COLUMNS = [
+    'country',
+    'source',
+    'year',
+    'type',
+    'reference_earnings',
+    'comparison_earnings',
+    'wage_gap'
+]
+
+
+def gap_rows(df, gap_type):
+    """Return the observations that enter a gap type"""
+    dimension, reference, comparison, fixed_column, fixed_value = GAP_DEFINITIONS[gap_type]
+    return df[
+        (df[fixed_column] == fixed_value) &
+        (df[dimension].isin([reference, comparison])) &
+        (df['earnings_ppp'].notna())
+    ]
+
+
+def _pair_gaps(df, gap_type):
+    """Compute one gap type for all (country, source, year) groups"""
+    dimension, reference, comparison = GAP_DEFINITIONS[gap_type][:3]
+    rows = gap_rows(df, gap_type)
+
+    wide = (
+        rows.assign(**{dimension: rows[dimension].astype(str)})
+        .groupby(['country', 'source', 'year', dimension], observed=True)['earnings_ppp']
+        .first()
+        .unstack(dimension)
+        .reindex(columns=[reference, comparison])
+        .dropna()
+    )
+
+    gaps = wide.rename(columns={
+        reference: 'reference_earnings',
+        comparison: 'comparison_earnings'
+    }).reset_index()
+    gaps['type'] = gap_type
+    gaps['wage_gap'] = (
+        (gaps['reference_earnings'] - gaps['comparison_earnings'])
+        / gaps['reference_earnings'] * 100
+    )
+    return gaps
+
+
+def compute_gaps(df):
+    """Compute gender and regional gaps for every country, source and year
+
+    Sources are kept as a dimension: a country-year surveyed by two sources
+    yields one gap per source. Use select_sources() to collapse them.
+    """
+    gaps = pd.concat([_pair_gaps(df, gap_type) for gap_type in GAP_DEFINITIONS], ignore_index=True)
+    for col in ['country', 'source']:
+        gaps[col] = gaps[col].astype(str)
+    return (
+        gaps[GAP_COLUMNS]
+        .sort_values(['country', 'type', 'year', 'source'], kind='stable')
+        .reset_index(drop=True)
+    )
+
+
+def _source_ranks(gaps, source_priority):
+    """Return each row's source priority rank and series length
+
+    Sources not in source_priority rank after those that are; the series
+    length is the number of years the source has a gap for that country and
+    gap type.
+    """
+    priority = {source: rank for rank, source in enumerate(source_priority or [])}
+    return gaps.assign(
+        _priority=gaps['source'].map(priority).fillna(len(priority)),
+        _series_length=gaps.groupby(['country', 'type', 'source'])['year'].transform('size')
+    )
+
+
+def select_sources(gaps, source_priority=None):
+    """Keep one source per (country, year, gap type)
+
+    source_priority is a list of source labels in order of preference; sources
+    not in the list rank after those that are. Remaining ties go to the source
+    with the longest series for that country and gap type, then alphabetically.
+    """
+    if gaps.empty:
+        return gaps
+
+    ranked = _source_ranks(gaps, source_priority).sort_values(
+        ['country', 'type', 'year', '_priority', '_series_length', 'source'],
+        ascending=[True, True, True, True, False, True],
+        kind='stable'
+    )
+    selected = ranked.drop_duplicates(['country', 'type', 'year'])
+    return selected.drop(columns=['_priority', '_series_length']).reset_index(drop=True)
+
+
+def latest_complete(gaps, source_priority=None, tie_break='latest'):
+    """Return the latest complete pair per (country, gap type)
+
+    gaps holds every source, as returned by compute_gaps(). Each source's
+    latest year with both groups is found first, then one source is kept per
+    country and gap type by the tie-break rule:
+
+    - 'latest': the most recent year wins; sources observed in that year are
+      ranked as in select_sources(), so the result matches the latest row of
+      select_sources(gaps, source_priority).
+    - 'priority': the highest-priority source wins even when another source
+      is more recent; remaining ties go to the most recent year.
+
+    Further ties go to the longest series, then alphabetically. The result
+    keeps GAP_COLUMNS, one row per (country, type), sorted by country and type.
+    """
+    if tie_break not in TIE_BREAKS:
+        raise ValueError(f'Unknown tie_break: {tie_break}')
+    if gaps.empty:
+        return gaps
+
+    # gaps are sorted by year within each (country, type), so a source's last row is its latest
+    per_source = _source_ranks(gaps, source_priority).drop_duplicates(['country', 'type', 'source'], keep='last')
+    if tie_break == 'latest':
+        keys, ascending = ['year', '_priority'], [False, True]
+    else:
+        keys, ascending = ['_priority', 'year'], [True, False]
+    ranked = per_source.sort_values(
+        ['country', 'type'] + keys + ['_series_length', 'source'],
+        ascending=[True, True] + ascending + [False, True],
+        kind='stable'
+    )
+    latest = ranked.drop_duplicates(['country', 'type'])
+    return latest[GAP_COLUMNS].reset_index(drop=True)
+
+
+def gap_positions(country_index, year_index, countries, years=None):
+    """Return the row positions of countries in a country-sorted gap table
+
+    country_index and year_index are the table's country and year columns as
+    arrays; each country is located with a binary search.
+    """
+    if isinstance(countries, str):
+        countries = [countries]
+
+    countries = np.asarray(countries, dtype=object)
+    starts = country_index.searchsorted(countries, side='left')
+    stops = country_index.searchsorted(countries, side='right')
+    positions = np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops)] or [np.arange(0)])
+
+    if years is not None:
+        selected_years = year_index[positions]
+        positions = positions[(selected_years >= years[0]) & (selected_years <= years[1])]
+    return positions
+
+
+def country_gaps(gaps, countries, years=None):
+    """Return the gaps for one or more countries, optionally within a year range
+
+    gaps must be sorted by country, as returned by compute_gaps() and
+    select_sources().
+    """
+    positions = gap_positions(gaps['country'].to_numpy(), gaps['year'].to_numpy(), countries, years)
+    return gaps.iloc[positions]
+
+
+def rank_gaps(gaps, gap_type, years=None):
+    """Rank countries by their latest gap of one type within a year range
+
+    Each country contributes the latest year with a gap inside the window,
+    alongside its mean gap and number of gap years in the window. Rank 1 is
+    the largest gap; ties share the better rank. gaps must hold one source
+    per (country, type, year) sorted by year within each country, as returned
+    by select_sources().
+    """
+    typed = gaps[gaps['type'] == gap_type]
+    if years is not None:
+        typed = typed[(typed['year'] >= years[0]) & (typed['year'] <= years[1])]
+
+    latest = typed.drop_duplicates('country', keep='last').set_index('country')
+    stats = typed.groupby('country')['wage_gap'].agg(['mean', 'size'])
+    ranking = latest.drop(columns='type').assign(mean_gap=stats['mean'], gap_years=stats['size'])
+    ranking = ranking.sort_values(['wage_gap', 'country'], ascending=[False, True]).reset_index()
+    ranking.insert(0, 'rank', ranking['wage_gap'].rank(method='min', ascending=False).astype(int))
+    return ranking
@@ -0,0 +1,154 @@
+"""
+Headless query API over the ILO wage statistics dataset
+
+WageQuery answers the same questions as the dashboard tools (gaps, trends,
+summaries) from the in-memory indexed dataset, one query or a batch at a
+time, and returns JSON-serializable results. Queries are dicts:
+
+    {"type": "gaps", "countries": ["Mali", "Zambia"], "years": [2010, 2020]}
+    {"type": "trends", "countries": ["Mali"], "years": [2015, 2020]}
+    {"type": "summary", "countries": ["Mali"]}
+    {"type": "ranking", "gap_type": "Gender Gap", "years": [2010, 2020]}
+    {"type": "countries"}
+
+"countries" may be omitted to query every country; "years" is an inclusive
+[min, max] range and "gap_type" optionally restricts gaps to "Gender Gap" or
+"Regional Gap". Rankings default to the gender gap.
+"""
+
+import pandas as pd
+
+from wage_data import CSV_FILE, COLUMNAR_FILE, TOOL_COLUMNS, WageIndex, file_checksum, load_wage_data
+from wage_gaps import GAP_DEFINITIONS, GENDER_GAP, gap_positions
+from wage_summary import load_cube
+from wage_tools import select_ranking
+
+# Columns returned for trend queries
+TREND_COLUMNS = ['country', 'source', 'sex', 'area_type', 'year', 'earnings_ppp']
+
+# Earnings are published with three decimals
+DECIMALS = 3
+
+
+def _records(df):
+    """Convert a frame to JSON-serializable records"""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype.kind == 'f':
+            df[col] = df[col].astype('float64').round(DECIMALS)
+        elif df[col].dtype.kind not in 'iu':
+            df[col] = df[col].astype(str)
+    return df.to_dict('records')
+
+
+def json_value(value):
+    """Convert a summary metric to a JSON value"""
+    if pd.isna(value):
+        return None
+    if isinstance(value, float):
+        return round(value, DECIMALS)
+    return value
+
+
+class WageQuery:
+    """Batched query interface over an indexed wage dataset
+
+    Rows are converted to JSON-ready records once, so answering a query only
+    locates row positions and picks the matching records.
+    """
+
+    def __init__(self, df, summary, gaps, version):
+        self.index = WageIndex(df)
+        self.summary = summary.to_dict('index')
+        self.gaps = gaps
+        self.version = version
+
+        self._summary_records = {
+            country: {key: json_value(value) for key, value in metrics.items()}
+            for country, metrics in self.summary.items()
+        }
+        self._trend_records = _records(df[TREND_COLUMNS])
+        self._gap_records = _records(gaps)
+        self._gap_countries = gaps['country'].to_numpy()
+        self._gap_years = gaps['year'].to_numpy()
+
+    @classmethod
+    def load(cls, csv_path=CSV_FILE, columnar_path=COLUMNAR_FILE):
+        """Load the dataset and its summary cube"""
+        df = load_wage_data(csv_path, columnar_path, columns=TOOL_COLUMNS)
+        summary, gaps = load_cube(df, csv_path)
+
+        # The compact frame holds earnings as float32, which loses the third
+        # decimal above about 16k, so trends are served from the CSV values
+        df['earnings_ppp'] = pd.read_csv(csv_path, usecols=['earnings_ppp'])['earnings_ppp'].to_numpy()
+        return cls(df, summary, gaps, file_checksum(csv_path))
+
+    def _countries(self, query):
+        """Return the countries a query asks for, defaulting to all"""
+        countries = query.get('countries')
+        if countries is None:
+            return self.index.countries
+        if isinstance(countries, str):
+            countries = [countries]
+        unknown = [c for c in countries if c not in self.summary]
+        if unknown:
+            raise ValueError(f'Unknown countries: {", ".join(map(str, unknown))}')
+        return countries
+
+    @staticmethod
+    def _years(query):
+        """Return a query's (min, max) year range, or None"""
+        years = query.get('years')
+        if years is None:
+            return None
+        if len(years) != 2:
+            raise ValueError('years must be a [min, max] pair')
+        return int(years[0]), int(years[1])
+
+    def query_gaps(self, query):
+        """Gender and regional gaps per country and year"""
+        positions = gap_positions(
+            self._gap_countries, self._gap_years, self._countries(query), self._years(query)
+        )
+        records = [self._gap_records[i] for i in positions]
+        gap_type = query.get('gap_type')
+        if gap_type is not None:
+            if gap_type not in GAP_DEFINITIONS:
+                raise ValueError(f'Unknown gap_type: {gap_type}')
+            records = [record for record in records if record['type'] == gap_type]
+        return records
+
+    def query_trends(self, query):
+        """Earnings observations per country and year"""
+        positions = self.index.positions(self._countries(query), years=self._years(query))
+        records = [self._trend_records[i] for i in positions]
+        return [record for record in records if record['earnings_ppp'] == record['earnings_ppp']]
+
+    def query_summary(self, query):
+        """Summary cube metrics per country"""
+        return {country: self._summary_records[country] for country in self._countries(query)}
+
+    def query_ranking(self, query):
+        """Countries ranked by their latest gap within the year range"""
+        return _records(select_ranking(self.gaps, query.get('gap_type', GENDER_GAP), self._years(query)))
+
+    def query_countries(self, query):
+        """Every country in the dataset"""
+        return self.index.countries
+
+    def run(self, query):
+        """Answer one query, returning {'data': ...} or {'error': ...}"""
+        handler = getattr(self, f'query_{query.get("type")}', None)
+        if handler is None:
+            return {'error': f'Unknown query type: {query.get("type")}'}
+        try:
+            return {'data': handler(query)}
+        except (ValueError, TypeError) as e:
+            return {'error': str(e)}
+
+    def run_batch(self, queries):
+        """Answer a list of queries against the same dataset version"""
+        return {
+            'version': self.version,
+            'results': [self.run(query) for query in queries]
+        }
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Local HTTP/JSON endpoint for the wage query API
+
+A small asyncio HTTP/1.1 server over WageQuery. Responses carry an ETag
+derived from the dataset version and the query, so clients can revalidate
+with If-None-Match, and encoded responses are kept in an LRU cache keyed on
+the same pair.
+
+Endpoints:
+    GET  /version                 dataset version
+    GET  /query?type=gaps&country=Mali&country=Zambia&start=2010&end=2020
+    POST /query                   {"queries": [{...}, ...]} or a single query
+
+Usage:
+    python wage_server.py [--host 127.0.0.1] [--port 8765]
+"""
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from wage_query import WageQuery
+
+REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed'
+}
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1 << 20
+
+
+def query_from_params(params):
+    """Build a query dict from GET parameters"""
+    query = {'type': params.get('type', [None])[0]}
+    if 'country' in params:
+        query['countries'] = params['country']
+    if 'start' in params or 'end' in params:
+        query['years'] = [params.get('start', [0])[0], params.get('end', [9999])[0]]
+    if 'gap_type' in params:
+        query['gap_type'] = params['gap_type'][0]
+    return query
+
+
+class WageServer:
+    """Serve WageQuery batches over HTTP with ETag revalidation"""
+
+    def __init__(self, query, cache_size=1024):
+        self.query = query
+        self._respond = functools.lru_cache(maxsize=cache_size)(self._encode)
+
+    def _encode(self, canonical):
+        """Answer a canonical JSON batch and return (etag, body)"""
+        body = json.dumps(self.query.run_batch(json.loads(canonical))).encode()
+        etag = hashlib.sha1(f'{self.query.version}:{canonical}'.encode()).hexdigest()
+        return f'"{etag}"', body
+
+    def answer(self, queries, if_none_match=None):
+        """Return (status, headers, body) for a batch of queries"""
+        canonical = json.dumps(queries, sort_keys=True, separators=(',', ':'))
+        etag, body = self._respond(canonical)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if if_none_match == etag:
+            return 304, headers, b''
+        return 200, headers, body
+
+    def route(self, method, target, headers, body):
+        """Dispatch one request to (status, headers, body)"""
+        url = urlsplit(target)
+        if url.path == '/version':
+            return 200, {}, json.dumps({'version': self.query.version}).encode()
+        if url.path != '/query':
+            return 404, {}, b'{"error": "Not found"}'
+
+        if method == 'GET':
+            queries = [query_from_params(parse_qs(url.query))]
+        elif method == 'POST':
+            try:
+                payload = json.loads(body or b'null')
+            except ValueError:
+                return 400, {}, b'{"error": "Request body is not valid JSON"}'
+            if isinstance(payload, dict) and 'queries' in payload:
+                queries = payload['queries']
+            elif isinstance(payload, dict):
+                queries = [payload]
+            else:
+                return 400, {}, b'{"error": "Expected a query or {\\"queries\\": [...]}"}'
+            if not isinstance(queries, list) or not all(isinstance(q, dict) for q in queries):
+                return 400, {}, b'{"error": "queries must be a list of objects"}'
+        else:
+            return 405, {}, b'{"error": "Method not allowed"}'
+
+        return self.answer(queries, headers.get('if-none-match'))
+
+    async def handle(self, reader, writer):
+        """Serve requests on one keep-alive connection"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in header_lines:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                request = request_line.split(' ', 2)
+                length = headers.get('content-length', '0')
+                keep_alive = False
+                if len(request) != 3:
+                    status, extra, body = 400, {}, b'{"error": "Malformed request line"}'
+                elif not length.isdigit():
+                    status, extra, body = 400, {}, b'{"error": "Invalid Content-Length"}'
+                elif int(length) > MAX_BODY:
+                    status, extra, body = 400, {}, b'{"error": "Request body too large"}'
+                else:
+                    method, target, version = request
+                    length = int(length)
+                    try:
+                        request_body = await reader.readexactly(length) if length else b''
+                    except asyncio.IncompleteReadError:
+                        # The client closed the connection before sending the whole body
+                        status, extra, body = 400, {}, b'{"error": "Incomplete request body"}'
+                    else:
+                        status, extra, body = self.route(method, target, headers, request_body)
+                        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                response_headers = {
+                    'Content-Type': 'application/json',
+                    'Content-Length': str(len(body)),
+                    'Connection': 'keep-alive' if keep_alive else 'close',
+                    **extra
+                }
+                head = f'HTTP/1.1 {status} {REASONS[status]}\r\n' + ''.join(
+                    f'{name}: {value}\r\n' for name, value in response_headers.items()
+                )
+                writer.write(head.encode('latin-1') + b'\r\n' + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        """Run the server until cancelled"""
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f'Serving dataset {self.query.version[:12]} on http://{host}:{port}')
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the wage query API over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='interface to bind')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on')
+    parser.add_argument('--cache-size', type=int, default=1024, help='cached responses')
+    args = parser.parse_args()
+
+    server = WageServer(WageQuery.load(), cache_size=args.cache_size)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
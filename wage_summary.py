@@ -0,0 +1,134 @@
+"""
+Per-country summary cube for the ILO wage statistics dataset
+
+Built at data-processing time next to ilostat_wage.csv so the dashboard can
+serve summary metrics, latest-year comparisons and gap series with a keyed
+lookup. Both cube files carry the checksum of the CSV they were built from and
+the source rule they were built with, and are recomputed in memory when
+missing or stale.
+
+The source rule decides which survey provides a country's latest pair when
+several cover it: WAGE_SOURCE_PRIORITY lists preferred sources separated by
+';' and WAGE_TIE_BREAK is 'latest' (the most recent year wins) or 'priority'
+(the preferred source wins). See wage_gaps.latest_complete().
+"""
+
+import json
+import os
+
+import pandas as pd
+
+from wage_data import CSV_FILE, file_checksum, load_wage_data, read_arrow, to_compact, write_arrow
+from wage_gaps import (
+    GENDER_GAP, REGIONAL_GAP, compute_gaps, gap_rows, latest_complete, select_sources
+)
+
+SUMMARY_FILE = 'ilostat_wage_summary.arrow'
+GAPS_FILE = 'ilostat_wage_gaps.arrow'
+
+# gap type -> column prefix in the summary cube
+GAP_PREFIXES = {
+    GENDER_GAP: 'gender',
+    REGIONAL_GAP: 'regional'
+}
+
+# Default source rule for the cube
+SOURCE_PRIORITY = [source for source in os.environ.get('WAGE_SOURCE_PRIORITY', '').split(';') if source]
+TIE_BREAK = os.environ.get('WAGE_TIE_BREAK', 'latest')
+
+RULE_KEY = b'source_rule'
+
+
+def source_rule(source_priority=None, tie_break=None):
+    """Return the cube's source rule as metadata tags, filling in defaults"""
+    rule = {
+        'source_priority': SOURCE_PRIORITY if source_priority is None else list(source_priority),
+        'tie_break': TIE_BREAK if tie_break is None else tie_break
+    }
+    return {RULE_KEY: json.dumps(rule, sort_keys=True).encode()}
+
+
+def build_summary(df, gaps, latest=None):
+    """Build one row of summary metrics per country
+
+    Columns per gap prefix: observations entering the gap, latest_year,
+    latest_source, reference_earnings, comparison_earnings and latest_gap for
+    the latest pair, plus mean_gap and gap_years across all years. latest is
+    the latest_complete() table; by default it is taken from gaps.
+    """
+    if latest is None:
+        latest = latest_complete(gaps)
+
+    summary = df.groupby('country', observed=True).agg(
+        years_available=('year', 'nunique'),
+        first_year=('year', 'min'),
+        latest_year=('year', 'max'),
+        data_points=('year', 'size')
+    )
+    summary['avg_earnings'] = (
+        df[df['sex'] == 'Total'].groupby('country', observed=True)['earnings_ppp'].mean()
+    )
+    summary.index = summary.index.astype(str)
+
+    for gap_type, prefix in GAP_PREFIXES.items():
+        typed = gaps[gaps['type'] == gap_type]
+        pair = latest[latest['type'] == gap_type].set_index('country')
+        stats = typed.groupby('country')['wage_gap'].agg(['mean', 'size'])
+        observations = gap_rows(df, gap_type).groupby('country', observed=True).size()
+        observations.index = observations.index.astype(str)
+        summary = summary.join(pd.DataFrame({
+            f'{prefix}_observations': observations,
+            f'{prefix}_latest_year': pair['year'].astype('Int16'),
+            f'{prefix}_latest_source': pair['source'],
+            f'{prefix}_reference_earnings': pair['reference_earnings'],
+            f'{prefix}_comparison_earnings': pair['comparison_earnings'],
+            f'{prefix}_latest_gap': pair['wage_gap'],
+            f'{prefix}_mean_gap': stats['mean'],
+            f'{prefix}_gap_years': stats['size']
+        }))
+        for col in [f'{prefix}_observations', f'{prefix}_gap_years']:
+            summary[col] = summary[col].fillna(0).astype('int32')
+
+    summary.index.name = 'country'
+    return summary.sort_index()
+
+
+def build_cube(df, source_priority=None, tie_break=None):
+    """Return the (summary, gaps) cube for a wage dataset
+
+    source_priority and tie_break default to WAGE_SOURCE_PRIORITY and
+    WAGE_TIE_BREAK.
+    """
+    rule = json.loads(source_rule(source_priority, tie_break)[RULE_KEY])
+    all_gaps = compute_gaps(df)
+    gaps = select_sources(all_gaps, rule['source_priority'])
+    latest = latest_complete(all_gaps, rule['source_priority'], rule['tie_break'])
+    return build_summary(df, gaps, latest), gaps
+
+
+def write_cube(csv_path=CSV_FILE, summary_path=SUMMARY_FILE, gaps_path=GAPS_FILE,
+               source_priority=None, tie_break=None):
+    """Build the cube for a tidy CSV file and write it next to the CSV"""
+    checksum = file_checksum(csv_path)
+    tags = source_rule(source_priority, tie_break)
+    summary, gaps = build_cube(to_compact(pd.read_csv(csv_path)), source_priority, tie_break)
+    write_arrow(summary.reset_index(), summary_path, checksum, tags)
+    write_arrow(gaps, gaps_path, checksum, tags)
+    return summary_path, gaps_path
+
+
+def load_cube(df=None, csv_path=CSV_FILE, summary_path=SUMMARY_FILE, gaps_path=GAPS_FILE,
+              source_priority=None, tie_break=None):
+    """Load the cube for df, rebuilding it when the files are missing or stale
+
+    The files are stale when built from another CSV or another source rule.
+    df is only needed for a rebuild and is loaded from csv_path when omitted.
+    """
+    checksum = file_checksum(csv_path)
+    tags = source_rule(source_priority, tie_break)
+    summary = read_arrow(summary_path, checksum, tags=tags)
+    gaps = read_arrow(gaps_path, checksum, tags=tags)
+    if summary is None or gaps is None:
+        df = load_wage_data(csv_path) if df is None else df
+        return build_cube(df, source_priority, tie_break)
+    return summary.set_index('country'), gaps
@@ -0,0 +1,130 @@
+"""
+Data selection for the dashboard tools
+
+Each function returns the frames one tool of streamlit_app.py renders for a
+selection, so the page, the benchmarks and other callers share one
+implementation. summary is the country -> metrics dict from the summary cube.
+"""
+
+import pandas as pd
+
+from wage_gaps import GAP_DEFINITIONS, GENDER_GAP, REGIONAL_GAP, country_gaps, rank_gaps
+from wage_summary import GAP_PREFIXES
+
+# Countries drawn as separate traces before a comparison shows quartiles
+COMPARISON_TRACE_LIMIT = 10
+
+QUARTILE_LABELS = ['25th percentile', 'Median', '75th percentile']
+
+# Summary cube metrics shown side by side in the Comparison Tool
+COMPARISON_SUMMARY_COLUMNS = [
+    'avg_earnings',
+    'years_available',
+    'first_year',
+    'latest_year',
+    'data_points',
+    'gender_latest_gap',
+    'regional_latest_gap'
+]
+
+
+def _observed(df):
+    """Drop rows without an earnings value"""
+    return df[df['earnings_ppp'].notna()]
+
+
+def latest_pair(country_summary, gap_type):
+    """Return the latest year's reference and comparison earnings for a gap type
+
+    The frame has one row per group, labelled in the gap's dimension column
+    (sex or area_type), or is None when no year has both groups.
+    """
+    prefix = GAP_PREFIXES[gap_type]
+    if pd.isna(country_summary[f'{prefix}_latest_year']):
+        return None
+
+    dimension, reference, comparison = GAP_DEFINITIONS[gap_type][:3]
+    return pd.DataFrame({
+        dimension: [reference, comparison],
+        'earnings_ppp': [
+            country_summary[f'{prefix}_reference_earnings'],
+            country_summary[f'{prefix}_comparison_earnings']
+        ]
+    })
+
+
+def select_disparity(summary, country):
+    """Return the Wage Disparity Tool data for a country, or None if unknown"""
+    country_summary = summary.get(country)
+    if country_summary is None:
+        return None
+
+    return {
+        'summary': country_summary,
+        'gender': latest_pair(country_summary, GENDER_GAP),
+        'regional': latest_pair(country_summary, REGIONAL_GAP)
+    }
+
+
+def select_trends(index, gaps, country, years=None):
+    """Return the Trends Tool series for a country within a year range"""
+    return {
+        'gender': _observed(index.select(country, sex=['Male', 'Female'], area_type='National', years=years)),
+        'regional': _observed(index.select(country, sex='Total', area_type=['Urban', 'Rural'], years=years)),
+        'gaps': country_gaps(gaps, country, years=years)
+    }
+
+
+def _quartile_series(df, value, facet=None):
+    """Collapse per-country series into per-year quartiles across countries
+
+    The quartile labels take the place of country names, so charts colored by
+    country draw three traces however many countries were selected.
+    """
+    keys = ([facet] if facet else []) + ['year']
+    if df.empty:
+        return pd.DataFrame(columns=keys + ['country', value])
+    quartiles = (
+        df.groupby(keys, observed=True)[value]
+        .quantile([0.25, 0.5, 0.75])
+        .unstack()
+        .set_axis(QUARTILE_LABELS, axis=1)
+        .reset_index()
+    )
+    return quartiles.melt(id_vars=keys, var_name='country', value_name=value)
+
+
+def select_comparison(index, summary, gaps, countries, trace_limit=COMPARISON_TRACE_LIMIT):
+    """Return the Comparison Tool series and summary table for a list of countries
+
+    Selections cost grows with the chosen countries only. Beyond trace_limit
+    countries the series are reduced to per-year quartiles across the
+    selection, so chart payloads stay bounded; 'aggregated' reports whether
+    that happened.
+    """
+    comparison = {
+        'national': _observed(index.select(countries, sex='Total', area_type='National')),
+        'gender': _observed(index.select(countries, sex=['Male', 'Female'], area_type='National')),
+        'regional': _observed(index.select(countries, sex='Total', area_type=['Urban', 'Rural'])),
+        'gaps': country_gaps(gaps, countries),
+        'summary': pd.DataFrame(
+            [[country] + [summary[country][col] for col in COMPARISON_SUMMARY_COLUMNS]
+             for country in countries if country in summary],
+            columns=['country'] + COMPARISON_SUMMARY_COLUMNS
+        ),
+        'aggregated': len(countries) > trace_limit
+    }
+
+    if comparison['aggregated']:
+        comparison['national'] = _quartile_series(comparison['national'], 'earnings_ppp')
+        comparison['gender'] = _quartile_series(comparison['gender'], 'earnings_ppp', 'sex')
+        comparison['regional'] = _quartile_series(comparison['regional'], 'earnings_ppp', 'area_type')
+        comparison['gaps'] = _quartile_series(comparison['gaps'], 'wage_gap', 'type')
+    return comparison
+
+
+def select_ranking(gaps, gap_type, years=None):
+    """Return the Ranking Tool league table for a gap type and year range"""
+    if gap_type not in GAP_DEFINITIONS:
+        raise ValueError(f'Unknown gap_type: {gap_type}')
+    return rank_gaps(gaps, gap_type, years)